@@ -0,0 +1,79 @@
+"""Session archive cost: appending sessions and paging the gallery.
+
+Fills a temporary archive with synthetic 1280x720 sessions and reports the
+time to archive one session, the bytes it takes on disk, and the time to
+read a gallery page at the start, middle and end of the archive.
+
+    python benchmarks/bench_archive.py [--sessions 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.archive import PAGE_SIZE, SessionArchive
+from photobooth.export import encode_image
+from photobooth.pipeline import render_strip
+
+
+def make_frames(rng, count=3, size=(1280, 720)):
+    frames = []
+    for _ in range(count):
+        # Smooth content compresses like a photo, unlike pure noise
+        small = rng.integers(0, 256, (size[1] // 40, size[0] // 40, 3), dtype=np.uint8)
+        image = QImage(small.data, small.shape[1], small.shape[0], small.strides[0],
+                       QImage.Format.Format_RGB888).scaled(*size)
+        frames.append(image.copy())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    rng = np.random.default_rng(0)
+    # A handful of distinct sessions, reused so the run stays short
+    samples = []
+    for _ in range(5):
+        frames = make_frames(rng)
+        strip = render_strip(frames, "sepia", "#723A03", "#FFFDD0")
+        samples.append((frames, encode_image(strip, "PNG")))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "archive.sqlite")
+        archive = SessionArchive(path)
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            frames, strip = samples[i % len(samples)]
+            archive.add(frames, "sepia", "#723A03", "#FFFDD0", f"strip-{i}.png", strip)
+        add_ms = (time.perf_counter() - start) * 1000 / args.sessions
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        print(f"{args.sessions} sessions, {add_ms:.1f} ms to archive each, "
+              f"{size / args.sessions / 1024:.0f} KiB per session on disk")
+        print(f"{'page':<10} {'read page':>10}")
+        for name, before in (("newest", None), ("middle", args.sessions // 2),
+                             ("oldest", PAGE_SIZE + 1)):
+            start = time.perf_counter()
+            for _ in range(20):
+                archive.page(before)
+            elapsed = (time.perf_counter() - start) * 1000 / 20
+            print(f"{name:<10} {elapsed:>8.2f}ms")
+        archive.close()
+    del app
+
+
+if __name__ == "__main__":
+    main()
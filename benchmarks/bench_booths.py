@@ -0,0 +1,147 @@
+"""Several booths in one process: per-booth latency with fair and FIFO pools.
+
+Each booth is a KioskWindow on its own PlaybackCapture camera, playing a
+generated clip. A simulated guest per booth runs sessions back to back:
+three shots, the filter screen, the final screen and Save. The first
+booth exports 4x6 prints at --print-dpi, and keeps a batch of --reprints
+strips queued on its lane the whole time, as a reprint from the gallery
+would. The same run is made with each booth on its own FairPool lane and
+with all of them on one lane, first come first served, both with
+--workers threads.
+
+    python benchmarks/bench_booths.py [--booths 3] [--seconds 20] [--workers 2] [--reprints 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+
+def make_clip(path, frames=60, size=(1280, 720)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), (200, 222, 245), dtype=np.uint8)
+        cv2.circle(frame, (size[0] * i // frames, size[1] // 2), size[1] // 4, (3, 58, 114), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def wait_for(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    loop = QEventLoop()
+    while not condition() and time.perf_counter() < deadline:
+        QTimer.singleShot(5, loop.quit)
+        loop.exec()
+
+
+class Guest:
+    """Steps one booth through sessions, a little at a time on each tick"""
+
+    def __init__(self, booth):
+        self.booth = booth
+
+    def step(self):
+        booth = self.booth
+        screen = booth.currentWidget()
+        if screen is booth.home:
+            booth.home.open_camera_window()
+        elif screen is booth.camera_screen:
+            camera = booth.camera_screen
+            if (camera.first_frame_ms is not None and not camera.countdown_active
+                    and camera.shots_pending == 0 and camera.image_count < 3):
+                # Skip the countdown wait; the shot itself goes through the burst as usual
+                camera.start_countdown(None)
+                camera.countdown_value = 1
+                camera.update_countdown()
+        elif screen is booth.filter_screen:
+            if booth.filter_screen.thumb_batch is None:
+                booth.filter_screen.go_to_final()
+        elif screen is booth.final_screen:
+            final = booth.final_screen
+            if final.save_button.isEnabled() and all(
+                    label.pixmap() is not None and not label.pixmap().isNull() for label in final.img_labels):
+                final.save_image()
+
+
+def reprint(booth, frames, count, size):
+    """Queue count strips of frames on the booth's lane, and again once they are done"""
+    import main as booth_app
+    from photobooth.pipeline import render_strip
+
+    batch = booth_app.TaskBatch(render_strip, [(frames, "sepia", "#723A03", "#FFFDD0", size)] * count,
+                                pool=booth.pool)
+    batch.finished.connect(lambda results: booth.isVisible() and reprint(booth, frames, count, size))
+    batch.start()
+    booth.reprint_batch = batch
+
+
+def run(args, clip, fair):
+    import main as booth_app
+    from photobooth.pipeline import RenderSettings
+
+    multi = booth_app.MultiBooth([booth_app.camera_source(clip)] * args.booths,
+                                 workers=args.workers, fair=fair)
+    heavy = RenderSettings(export_dpi=args.print_dpi, print_size=(4, 6))
+    multi.booths[0].final_screen.settings = heavy
+    multi.show()
+    camera = multi.booths[0].camera
+    wait_for(lambda: camera.latest()[1] is not None, 10)
+    frames = [np.ascontiguousarray(camera.latest()[1][..., ::-1])] * 3
+    if args.reprints:
+        reprint(multi.booths[0], frames, args.reprints, heavy.strip_size())
+    guests = [Guest(booth) for booth in multi.booths]
+    timer = QTimer()
+    timer.timeout.connect(lambda: [guest.step() for guest in guests])
+    timer.start(20)
+    wait_for(lambda: False, args.seconds)
+    timer.stop()
+    # Let strips already saved finish so their latency counts
+    wait_for(lambda: all(booth.writer.depth == 0 for booth in multi.booths), 60)
+    wait_for(lambda: False, 0.2)
+    metrics = multi.metrics()
+    multi.close()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--booths", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--print-dpi", type=int, default=300)
+    parser.add_argument("--reprints", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # Strips go to a throwaway ~/Downloads; nothing is archived
+        os.environ["HOME"] = home
+        os.environ["PHOTOBOOTH_ARCHIVE"] = "0"
+        os.environ["PHOTOBOOTH_BURST_FRAMES"] = "3"
+        clip = os.path.join(home, "clip.avi")
+        make_clip(clip)
+        app = QApplication([])
+        print(f"{args.booths} booths for {args.seconds:.0f}s on {args.workers} workers; "
+              f"booth1 prints 4x6 at {args.print_dpi} dpi with {args.reprints} reprints queued")
+        print(f"{'':<6} {'booth':<7} {'sessions':>8} {'first frame':>12} {'save p50':>9} {'save p95':>9} "
+              f"{'pool wait p95':>14}")
+        for name, fair in (("fair", True), ("fifo", False)):
+            for booth, m in run(args, clip, fair).items():
+                print(f"{name:<6} {booth:<7} {m['sessions']:>8} {m['first_frame_p50_ms']:>10.0f}ms "
+                      f"{m['save_p50_ms']:>7.0f}ms {m['save_p95_ms']:>7.0f}ms "
+                      f"{m['pool']['wait_p95_ms']:>12.0f}ms")
+        del app
+
+
+if __name__ == "__main__":
+    main()
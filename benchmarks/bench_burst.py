@@ -0,0 +1,58 @@
+"""Cost and accuracy of burst best-frame selection.
+
+Scores a five-frame burst at common camera resolutions, where one frame is
+sharp and well exposed and the rest are motion-blurred, too dark or too
+bright. Reports the time pick_best takes on one thread (this is the delay
+before a shot is kept) and whether it picked the right frame.
+
+    python benchmarks/bench_burst.py [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cv2
+import numpy as np
+
+from photobooth.burst import pick_best
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def make_burst(width, height):
+    rng = np.random.default_rng(0)
+    small = rng.integers(40, 216, (height // 8, width // 8, 3), dtype=np.uint8)
+    sharp = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+    kernel = np.zeros((15, 15), np.float32)
+    kernel[7, :] = 1 / 15
+    blurred = cv2.filter2D(sharp, -1, kernel)
+    dark = (sharp * 0.25).astype(np.uint8)
+    bright = cv2.add(sharp, 120)
+    # The sharp, well exposed frame sits right after the shutter
+    return [blurred, dark, sharp, cv2.GaussianBlur(sharp, (9, 9), 0), bright], 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    print(f"{'resolution':<12} {'score burst':>12} {'picked':>8}")
+    for width, height in RESOLUTIONS:
+        frames, expected = make_burst(width, height)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index, scores = pick_best(frames)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        verdict = "ok" if index == expected else f"wrong ({index})"
+        print(f"{f'{width}x{height}':<12} {elapsed * 1000:>10.2f}ms {verdict:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Camera configurations: preview cost, still size and adapting on a slow host.
+
+A generated 1080p clip is played back through PlaybackCapture, which
+behaves like a typical USB webcam: MJPG at 30 fps up to 1920x1080, raw
+YUYV at 30 fps only up to 640x480. Each configuration runs the preview
+for --seconds, rendering the newest frame every 30 ms as CameraWindow
+does, then switches to its still size like a countdown would; frame rate
+and render time are taken over the last half of the run. The slow
+host runs add --cost-ms per megapixel to every frame.
+
+    python benchmarks/bench_camera.py [--seconds 6] [--cost-ms 30] [--switch-ms 150]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.camera import MAX_SIZE, CameraCapture, CameraConfig
+from photobooth.playback import PlaybackCapture
+from photobooth.preview import PreviewRenderer
+
+PREVIEW_BOX = (388, 388)
+
+
+def make_clip(path, frames=90, size=(1920, 1080)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), (200, 222, 245), dtype=np.uint8)
+        cv2.circle(frame, (size[0] * i // frames, size[1] // 2), size[1] // 4, (3, 58, 114), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def run(clip, config, args, cost_ms=0.0):
+    camera = CameraCapture(lambda: PlaybackCapture(clip, switch_ms=args.switch_ms, cost_ms_per_mp=cost_ms),
+                           config=config).start()
+    camera.wait_opened()
+    preview = PreviewRenderer(*PREVIEW_BOX)
+    render_ms = []
+    shown_at = []
+    last_seq = -1
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        seq, frame = camera.latest()
+        if frame is not None and seq != last_seq:
+            before = time.perf_counter()
+            preview.render(frame)
+            render_ms.append((time.perf_counter() - before) * 1000)
+            shown_at.append(before - start)
+            last_seq = seq
+        time.sleep(0.03)
+    preview_mode = camera.mode
+    preview_shape = camera.latest()[1].shape
+
+    switch_ms = None
+    still_shape = preview_shape
+    if config.still is not None:
+        camera.use_still()
+        before = time.perf_counter()
+        while time.perf_counter() - before < 5:
+            seq, frame = camera.latest()
+            if frame is not None and frame.shape != preview_shape:
+                switch_ms = (time.perf_counter() - before) * 1000
+                still_shape = frame.shape
+                break
+            time.sleep(0.005)
+        camera.use_preview()
+    camera.stop()
+    # Only the last half of the run counts, once any stepping down is over
+    half = args.seconds / 2
+    settled = sorted(ms for ms, at in zip(render_ms, shown_at) if at >= half)
+    return {
+        "mode": f"{preview_shape[1]}x{preview_shape[0]} {preview_mode.fourcc if preview_mode else '-'}",
+        "fps": len(settled) / (args.seconds - half),
+        "render_ms": settled[len(settled) // 2] if settled else 0.0,
+        "still": f"{still_shape[1]}x{still_shape[0]}",
+        "switch_ms": switch_ms,
+        "step_downs": camera.step_downs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--cost-ms", type=float, default=30.0, help="slow host decode time per megapixel")
+    parser.add_argument("--switch-ms", type=float, default=150.0, help="simulated stream restart time")
+    args = parser.parse_args()
+
+    app = QApplication([])
+    runs = [
+        ("driver default", CameraConfig(preview=None, still=None), 0.0),
+        ("1080p YUYV", CameraConfig(preview=(1920, 1080), still=None, formats=("YUYV",), adapt=False), 0.0),
+        ("1080p MJPG", CameraConfig(preview=(1920, 1080), still=None, adapt=False), 0.0),
+        ("negotiated", CameraConfig(), 0.0),
+        ("slow, fixed", CameraConfig(preview=(1920, 1080), still=MAX_SIZE, adapt=False), args.cost_ms),
+        ("slow, adapt", CameraConfig(preview=(1920, 1080), still=MAX_SIZE), args.cost_ms),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        clip = os.path.join(directory, "clip.avi")
+        make_clip(clip)
+        print(f"{args.seconds:.0f}s preview per run, {args.switch_ms:.0f} ms stream restarts, "
+              f"slow host {args.cost_ms:.0f} ms per megapixel")
+        print(f"{'':<15} {'preview':>15} {'fps':>5} {'render':>8} {'steps':>5} {'still':>10} {'switch':>8}")
+        for name, config, cost_ms in runs:
+            r = run(clip, config, args, cost_ms)
+            switch = f"{r['switch_ms']:.0f}ms" if r["switch_ms"] is not None else "-"
+            print(f"{name:<15} {r['mode']:>15} {r['fps']:>5.1f} {r['render_ms']:>6.2f}ms "
+                  f"{r['step_downs']:>5} {r['still']:>10} {switch:>8}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Time and peak RSS of high-resolution strip export.
+
+Renders 2x6 in. and 4x6 in. prints at 300 and 600 DPI from three 12 MP
+photos, once on a full in-memory canvas (render_strip + QImage.save) and
+once with the banded exporter. Every run is a separate process so peak
+RSS is measured cleanly.
+
+    python benchmarks/bench_export.py [--source 4000x3000] [--format png]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rss import peak_kb, reset_peak
+
+PRINTS = [("2x6", 300), ("2x6", 600), ("4x6", 300), ("4x6", 600)]
+
+
+def run_one(mode, print_name, dpi, source, path):
+    import numpy as np
+    from PyQt6.QtGui import QImage
+
+    from photobooth.cache import FilterCache
+    from photobooth.export import export_strip
+    from photobooth.filters import array_to_qimage
+    from photobooth.pipeline import PRINT_SIZES, RenderSettings, render_strip
+
+    width, height = source
+    rng = np.random.default_rng(0)
+    # QPixmap.toImage hands the GUI 32-bit images, which Qt scales without a conversion copy
+    sources = [array_to_qimage(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+               .convertToFormat(QImage.Format.Format_RGB32) for _ in range(3)]
+    settings = RenderSettings(export_dpi=dpi, print_size=PRINT_SIZES[print_name])
+
+    baseline = reset_peak()
+    start = time.perf_counter()
+    if mode == "canvas":
+        strip = render_strip(sources, "sepia", "#723A03", "#FFFDD0", settings.strip_size(),
+                             cache=FilterCache(max_bytes=0))
+        strip.save(path)
+    else:
+        export_strip(sources, "sepia", "#723A03", "#FFFDD0", path, settings)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"time": elapsed, "peak_kb": peak_kb() - baseline,
+                      "size": "x".join(map(str, settings.strip_size()))}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="4000x3000", help="source photo size")
+    parser.add_argument("--format", default="png", choices=("png", "jpg"))
+    parser.add_argument("--run", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    source = tuple(int(v) for v in args.source.split("x"))
+
+    if args.run:
+        mode, print_name, path = args.run
+        name, dpi = print_name.split("@")
+        run_one(mode, name, int(dpi), source, path)
+        return
+
+    print(f"three {args.source} sources, {args.format.upper()} output, peak RSS above the loaded sources")
+    print(f"{'print':<10} {'pixels':>10} {'canvas':>18} {'banded':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for print_name, dpi in PRINTS:
+            cells = []
+            for mode in ("canvas", "banded"):
+                path = os.path.join(directory, f"{mode}.{args.format}")
+                out = subprocess.run(
+                    [sys.executable, __file__, "--source", args.source,
+                     "--run", mode, f"{print_name}@{dpi}", path],
+                    capture_output=True, text=True, check=True)
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                cells.append(f"{result['time'] * 1000:>6.0f}ms {result['peak_kb'] / 1024:>7.1f}MB")
+            print(f"{print_name}@{dpi:<5} {result['size']:>10} {cells[0]:>18} {cells[1]:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare the vectorized filters against the original per-pixel loops.
+
+Run from the repository root:
+
+    python benchmarks/bench_filters.py [--width 1280 --height 720]
+
+The legacy loops are slow, so they run on a smaller sample by default and
+their time is scaled up to the full frame size.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from photobooth.filters import FILTERS, filter_qimage, qimage_view
+
+
+# ---------------------- Legacy loops ----------------------
+# Copies of the per-pixel code FinalDisplayWindow used before the vectorized
+# engine, working on QImage directly.
+
+def legacy_filter(image, name):
+    image = image.copy()
+    width, height = image.width(), image.height()
+    for x in range(width):
+        for y in range(height):
+            pixel = image.pixel(x, y)
+            r, g, b = (pixel >> 16) & 255, (pixel >> 8) & 255, pixel & 255
+            if name == "sepia":
+                tr = min(255, int(0.393 * r + 0.769 * g + 0.189 * b))
+                tg = min(255, int(0.349 * r + 0.686 * g + 0.168 * b))
+                tb = min(255, int(0.272 * r + 0.534 * g + 0.131 * b))
+                r, g, b = tr, tg, tb
+            elif name == "bw":
+                r = g = b = int(0.299 * r + 0.587 * g + 0.114 * b)
+            elif name == "warm":
+                r = min(255, int(r * 1.2))
+                g = min(255, int(g * 1.1))
+                b = int(b * 0.8)
+            elif name == "yellow":
+                r = min(255, int(r * 1.15))
+                g = min(255, int(g * 1.15))
+                b = int(b * 0.7)
+            image.setPixel(x, y, (255 << 24) | (r << 16) | (g << 8) | b)
+    return image
+
+
+def random_image(width, height, seed=0):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    view = qimage_view(image)
+    view[...] = np.random.default_rng(seed).integers(0, 256, view.shape, dtype=np.uint8)
+    view[..., 3] = 255
+    return image
+
+
+def argb_array(image):
+    image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    return qimage_view(image).copy()
+
+
+def timed(func, *args, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--legacy-width", type=int, default=160)
+    parser.add_argument("--legacy-height", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    full = random_image(args.width, args.height)
+    sample = random_image(args.legacy_width, args.legacy_height, seed=1)
+    scale = (args.width * args.height) / (args.legacy_width * args.legacy_height)
+
+    print(f"{'filter':<8} {'vectorized':>12} {'legacy (est.)':>14} {'speedup':>9}  exact")
+    for name in FILTERS:
+        exact = np.array_equal(argb_array(filter_qimage(sample, name)),
+                               argb_array(legacy_filter(sample, name)))
+        fast = timed(filter_qimage, full, name, repeat=args.repeat)
+        slow = timed(legacy_filter, sample, name) * scale
+        print(f"{name:<8} {fast * 1000:>10.2f}ms {slow * 1000:>12.0f}ms {slow / fast:>8.0f}x  {exact}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Time and peak memory of loading three uploads.
+
+Compares the original UploadWindow path (QPixmap thumbnail plus a second,
+full-resolution QPixmap per slot) with photobooth.loader. Each mode runs in
+its own process so peak RSS is measured cleanly.
+
+    python benchmarks/bench_loader.py [--width 6000 --height 4000]
+"""
+
+import argparse
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from rss import peak_kb, reset_peak
+
+THUMBNAIL_BOX = (100, 100)
+
+
+def with_exif_orientation(jpeg, orientation):
+    """Insert a minimal EXIF block carrying only the Orientation tag"""
+    tiff = (b"MM\x00\x2a" + struct.pack(">I", 8) + struct.pack(">H", 1)
+            + struct.pack(">HHIHH", 0x0112, 3, 1, orientation, 0) + struct.pack(">I", 0))
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    return jpeg[:2] + app1 + jpeg[2:]
+
+
+def make_photos(directory, width, height, count=3):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    # Smooth content compresses like a real photo
+    small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"photo{i}.jpg")
+        with open(path, "wb") as fh:
+            fh.write(with_exif_orientation(encoded.tobytes(), 6))
+        paths.append(path)
+    return paths
+
+
+def run_mode(mode, paths):
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QPixmap
+    from PyQt6.QtWidgets import QApplication
+
+    from photobooth.loader import load_image
+    from photobooth.pipeline import RenderSettings
+
+    app = QApplication([])
+    baseline = reset_peak()
+    kept = []
+    start = time.perf_counter()
+    for path in paths:
+        if mode == "legacy":
+            thumb = QPixmap(path).scaled(*THUMBNAIL_BOX, Qt.AspectRatioMode.KeepAspectRatio,
+                                         Qt.TransformationMode.SmoothTransformation)
+            kept.append((thumb, QPixmap(path)))
+        else:
+            loaded = load_image(path, RenderSettings().source_boxes(), THUMBNAIL_BOX)
+            kept.append((QPixmap.fromImage(loaded.thumbnail), QPixmap.fromImage(loaded.image)))
+    elapsed = time.perf_counter() - start
+    kept_bytes = sum(p.width() * p.height() * p.depth() // 8 for pair in kept for p in pair)
+    size = kept[0][1].size()
+    print(json.dumps({
+        "time": elapsed,
+        "peak_kb": peak_kb() - baseline,
+        "kept_kb": kept_bytes // 1024,
+        "size": f"{size.width()}x{size.height()}",
+    }))
+    del app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--mode", choices=("legacy", "loader"), help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.paths)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_photos(directory, args.width, args.height)
+        print(f"three {args.width}x{args.height} JPEGs with EXIF orientation 6")
+        print(f"{'mode':<8} {'time':>9} {'peak RSS':>10} {'kept':>9}  decoded")
+        for mode in ("legacy", "loader"):
+            out = subprocess.run([sys.executable, __file__, "--mode", mode] + paths,
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:<8} {result['time'] * 1000:>7.0f}ms {result['peak_kb'] / 1024:>8.1f}MB "
+                  f"{result['kept_kb'] / 1024:>7.1f}MB  {result['size']}")
+
+
+if __name__ == "__main__":
+    main()
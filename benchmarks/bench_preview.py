@@ -0,0 +1,102 @@
+"""Per-frame cost of the camera preview path.
+
+Compares the original path (cvtColor into a new array, full-resolution
+QImage and QPixmap per frame) with PreviewRenderer, with and without a
+live filter, and counts Python-side allocations per frame with tracemalloc.
+
+    python benchmarks/bench_preview.py [--width 1280 --height 720 --frames 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.filters import FILTERS
+from photobooth.preview import HAS_BGR888, PreviewRenderer
+
+PREVIEW_BOX = (388, 388)
+
+
+def legacy_preview(frame):
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h, w, ch = rgb.shape
+    image = QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
+    return QPixmap.fromImage(image)
+
+
+def measure(step, frames):
+    # Warm up so one-time buffer allocation is not counted
+    for frame in frames[:5]:
+        step(frame)
+
+    start = time.perf_counter()
+    for frame in frames:
+        step(frame)
+    per_frame = (time.perf_counter() - start) / len(frames)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for frame in frames:
+        step(frame)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    # Allocations made and freed within the loop still show up as peak usage
+    allocated = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    return per_frame, allocated / len(frames), blocks / len(frames)
+
+
+def measure_peak(step, frames):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for frame in frames:
+        step(frame)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    paths = [("legacy", legacy_preview)]
+    if HAS_BGR888:
+        paths.append(("bgr888", PreviewRenderer(*PREVIEW_BOX, use_bgr888=True).render))
+    paths.append(("rgb888", PreviewRenderer(*PREVIEW_BOX, use_bgr888=False).render))
+    for name in FILTERS:
+        renderer = PreviewRenderer(*PREVIEW_BOX)
+        renderer.set_filter(name)
+        paths.append((f"+{name}", renderer.render))
+
+    print(f"{args.width}x{args.height} frames into a {PREVIEW_BOX[0]}x{PREVIEW_BOX[1]} preview")
+    print(f"{'path':<8} {'ms/frame':>9} {'retained B/frame':>17} {'blocks/frame':>13} {'peak traced':>12}")
+    for name, step in paths:
+        per_frame, retained, blocks = measure(step, frames)
+        peak = measure_peak(step, frames[:20])
+        print(f"{name:<8} {per_frame * 1000:>9.3f} {retained:>17.1f} {blocks:>13.2f} {peak / 1024:>10.0f}KB")
+    del app
+
+
+if __name__ == "__main__":
+    main()
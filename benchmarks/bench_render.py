@@ -0,0 +1,145 @@
+"""pytest-benchmark suite for the rendering core.
+
+Not collected by the default test run; invoke it explicitly:
+
+    python -m pytest benchmarks/bench_render.py --benchmark-autosave
+    python -m pytest benchmarks/bench_render.py --benchmark-compare
+
+Covers every filter at each capture size, the cost of each vintage effect
+with and without its cached masks, scale-first versus filter-first photo
+rendering, end-to-end strip rendering from arrays and QImages, and how
+little a strip costs when only its colors change.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from photobooth import effects
+from photobooth.cache import FilterCache
+from photobooth.filters import FILTERS, apply_to_array, array_to_qimage, filter_qimage
+from photobooth.pipeline import (PHOTO_SIZE, PREVIEW_SIZE, STRIP_SIZE, FrameLayers, RenderSettings,
+                                 render_photo, render_strip)
+
+SIZES = {
+    "vga": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "12mp": (4000, 3000),
+}
+
+
+def frame(size, seed=0):
+    width, height = size
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.fixture(scope="module", params=list(SIZES), ids=list(SIZES))
+def source(request):
+    array = frame(SIZES[request.param])
+    return array, array_to_qimage(array)
+
+
+def no_cache():
+    # A zero budget cache never stores anything, so every round does the work
+    return FilterCache(max_bytes=0)
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_filter_qimage(benchmark, source, name):
+    _, image = source
+    benchmark(filter_qimage, image, name)
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_filter_array(benchmark, source, name):
+    array, _ = source
+    work = array.copy()
+    benchmark(apply_to_array, work, name)
+
+
+@pytest.mark.parametrize("name", FILTERS.effects() + ["+".join(FILTERS.effects())])
+def test_effect(benchmark, source, name):
+    array, _ = source
+    work = array.copy()
+    apply_to_array(work, name)  # builds the masks for this size
+    benchmark(apply_to_array, work, name)
+
+
+@pytest.mark.parametrize("name", FILTERS.effects())
+def test_effect_uncached(benchmark, source, name):
+    array, _ = source
+    work = array.copy()
+
+    def run():
+        effects.masks.cache_clear()
+        apply_to_array(work, name)
+
+    benchmark(run)
+
+
+@pytest.mark.parametrize("size", [PREVIEW_SIZE, PHOTO_SIZE], ids=["preview", "photo"])
+def test_effects_on_sepia(benchmark, size):
+    # Three photos per strip share one set of masks
+    image = array_to_qimage(frame(size))
+    name = "+".join(["sepia"] + FILTERS.effects())
+    benchmark(lambda: [filter_qimage(image, name) for _ in range(3)])
+
+
+@pytest.mark.parametrize("scale_first", [True, False], ids=["scale-first", "filter-first"])
+def test_render_photo(benchmark, source, scale_first):
+    _, image = source
+    settings = RenderSettings(scale_first=scale_first)
+    benchmark(render_photo, image, "sepia", PHOTO_SIZE, settings, cache=no_cache())
+
+
+@pytest.mark.parametrize("dpi", [96, 300])
+def test_render_strip_qimage(benchmark, source, dpi):
+    _, image = source
+    size = RenderSettings(export_dpi=dpi).export_size(STRIP_SIZE)
+    benchmark(render_strip, [image] * 3, "sepia", "#723A03", "#FFFDD0", size, cache=no_cache())
+
+
+def test_render_strip_array(benchmark, source):
+    array, _ = source
+    images = [array, array[::-1], array[:, ::-1]]
+    benchmark(render_strip, images, "warm", "#723A03", "#FFFDD0", cache=no_cache())
+
+
+STRIP_COLORS = ["#723A03", "#F5DEB3", "#A0522D", "#8B4513"]
+
+
+@pytest.mark.parametrize("dpi", [96, 300, 600])
+def test_strip_full_render(benchmark, dpi):
+    benchmark.group = f"strip colors {dpi}dpi"
+    images = [array_to_qimage(frame(SIZES["1080p"], seed)) for seed in range(3)]
+    size = RenderSettings(export_dpi=dpi).export_size(STRIP_SIZE)
+    benchmark(render_strip, images, "sepia", "#723A03", "#FFFDD0", size,
+              cache=no_cache(), layers=FrameLayers(max_layers=0))
+
+
+@pytest.mark.parametrize("dpi", [96, 300, 600])
+@pytest.mark.parametrize("repeat", [False, True], ids=["new-color", "seen-color"])
+def test_strip_color_change(benchmark, dpi, repeat):
+    # Photos are cached; a new color paints one frame layer, a seen one paints none
+    benchmark.group = f"strip colors {dpi}dpi"
+    images = [array_to_qimage(frame(SIZES["1080p"], seed)) for seed in range(3)]
+    size = RenderSettings(export_dpi=dpi).export_size(STRIP_SIZE)
+    cache = FilterCache()
+    layers = FrameLayers(max_layers=len(STRIP_COLORS) if repeat else 0)
+    for color in STRIP_COLORS:
+        render_strip(images, "sepia", color, "#FFFDD0", size, cache=cache, layers=layers)
+    rounds = iter(range(1 << 30))
+
+    def recolor():
+        color = STRIP_COLORS[next(rounds) % len(STRIP_COLORS)]
+        render_strip(images, "sepia", color, "#FFFDD0", size, cache=cache, layers=layers)
+
+    benchmark(recolor)
@@ -0,0 +1,93 @@
+"""Time from session start to the first camera preview frame.
+
+Compares opening a new CameraWindow per guest with the kiosk, which keeps
+one camera open and resets its screens. The camera is simulated at 30 fps
+with a configurable device init delay, since real webcams often take 1-2 s
+to open.
+
+    python benchmarks/bench_session.py [--sessions 5] [--init-delay 1.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+
+class SimulatedCamera:
+    """Stands in for cv2.VideoCapture with a 640x480 feed at 30 fps"""
+
+    def __init__(self):
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def read(self, out=None):
+        time.sleep(1 / 30)
+        self.frame += 1
+        if out is not None and out.shape == self.frame.shape:
+            out[...] = self.frame
+            return True, out
+        return True, self.frame.copy()
+
+    def release(self):
+        pass
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    loop = QEventLoop()
+    while not condition() and time.perf_counter() < deadline:
+        QTimer.singleShot(1, loop.quit)
+        loop.exec()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--init-delay", type=float, default=1.0, help="simulated device open time in seconds")
+    args = parser.parse_args()
+
+    app = QApplication([])
+    import main as booth
+
+    def open_camera():
+        time.sleep(args.init_delay)
+        return SimulatedCamera()
+
+    fresh = []
+    for _ in range(args.sessions):
+        window = booth.CameraWindow(open_camera)
+        window.show()
+        wait_for(lambda: window.first_frame_ms is not None)
+        fresh.append(window.first_frame_ms)
+        window.close()
+
+    kiosk = booth.KioskWindow(open_camera)
+    kiosk.show()
+    kiosk.camera.wait_opened()
+    for _ in range(args.sessions):
+        count = len(kiosk.first_frame_times)
+        kiosk.home.open_camera_window()
+        wait_for(lambda: len(kiosk.first_frame_times) > count)
+        kiosk.finish()
+    kiosk.close()
+
+    print(f"{args.sessions} sessions, {args.init_delay:.1f}s simulated camera init, "
+          f"target {booth.FIRST_FRAME_TARGET_MS} ms")
+    for name, times in (("new window", fresh), ("kiosk", list(kiosk.first_frame_times))):
+        print(f"{name:<12} median {np.median(times):>8.1f}ms  max {max(times):>8.1f}ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
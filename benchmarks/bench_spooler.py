@@ -0,0 +1,123 @@
+"""Print/share spooler throughput and queue latency against local stand-ins.
+
+The printer is a directory that takes --print-ms per sheet and gets two
+strips per sheet; the share kiosk is a socket server on localhost that
+takes --share-ms per strip and turns down every --fail-every'th request,
+so retries are exercised. Strips arrive every --interval-ms, faster than
+the sinks can take them, so the bounded queues push back on submission.
+
+    python benchmarks/bench_spooler.py [--strips 40] [--print-ms 150] [--share-ms 60]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.spooler import DirectorySink, Route, SocketSink, Spooler
+
+
+class SlowDirectorySink(DirectorySink):
+    def __init__(self, directory, delay):
+        super().__init__(directory)
+        self.delay = delay
+
+    async def send(self, item):
+        await asyncio.sleep(self.delay)
+        await super().send(item)
+
+
+async def share_server(delay, fail_every):
+    requests = 0
+
+    async def handle(reader, writer):
+        nonlocal requests
+        requests += 1
+        name, size = (await reader.readline()).decode().split()
+        await reader.readexactly(int(size))
+        await asyncio.sleep(delay)
+        writer.write(b"BUSY\n" if fail_every and requests % fail_every == 0 else b"OK\n")
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def make_strips(directory, count):
+    paths = []
+    for i in range(count):
+        image = QImage(600, 1800, QImage.Format.Format_RGB32)
+        image.fill(QColor(114, 58, 3).lighter(100 + i % 50))
+        path = os.path.join(directory, f"photostrip-{i:04d}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+async def run(args, strips, printer_dir):
+    server = await share_server(args.share_ms / 1000, args.fail_every)
+    port = server.sockets[0].getsockname()[1]
+    routes = [
+        Route("printer", SlowDirectorySink(printer_dir, args.print_ms / 1000), batch=2,
+              batch_timeout=1.0, max_pending=args.max_pending),
+        Route("share", SocketSink("127.0.0.1", port), max_pending=args.max_pending, backoff=0.05),
+    ]
+    spooler = Spooler(routes)
+    blocked = []
+
+    async def booth(spooler):
+        start = time.perf_counter()
+        for path in strips:
+            before = time.perf_counter()
+            await spooler.put(path)
+            blocked.append((time.perf_counter() - before) * 1000)
+            await asyncio.sleep(args.interval_ms / 1000)
+        await spooler.drain()
+        return time.perf_counter() - start
+
+    async with server:
+        elapsed = await spooler.run(booth)
+    return spooler.stats(), elapsed, blocked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strips", type=int, default=40)
+    parser.add_argument("--interval-ms", type=float, default=20)
+    parser.add_argument("--print-ms", type=float, default=150)
+    parser.add_argument("--share-ms", type=float, default=60)
+    parser.add_argument("--fail-every", type=int, default=5)
+    parser.add_argument("--max-pending", type=int, default=8)
+    args = parser.parse_args()
+
+    # Every refused share request would log a retry warning
+    logging.getLogger("photobooth.spooler").setLevel(logging.ERROR)
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as directory:
+        strips = make_strips(directory, args.strips)
+        printer_dir = os.path.join(directory, "printer")
+        stats, elapsed, blocked = asyncio.run(run(args, strips, printer_dir))
+        sheets = len(os.listdir(printer_dir))
+
+    print(f"{args.strips} strips in {elapsed:.2f}s, {sheets} printed sheets, "
+          f"submit blocked up to {max(blocked):.0f} ms (queue limit {args.max_pending})")
+    print(f"{'route':<8} {'sent':>5} {'items':>6} {'failed':>7} {'retried':>8} "
+          f"{'per min':>8} {'p50':>9} {'p95':>9}")
+    for name, s in stats.items():
+        print(f"{name:<8} {s['sent']:>5} {s['items']:>6} {s['failed']:>7} {s['retried']:>8} "
+              f"{s['per_minute']:>8.0f} {s['p50_ms']:>7.0f}ms {s['p95_ms']:>7.0f}ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
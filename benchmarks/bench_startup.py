@@ -0,0 +1,142 @@
+"""Startup to first paint, and "Use Camera" click to first preview frame.
+
+Each run launches a fresh interpreter that shows the home screen, waits a
+moment like a guest would, then clicks "Use Camera". The camera is
+simulated at 30 fps with a configurable device init delay, since real
+webcams often take 1-2 s to open. Runs with and without the background
+camera warm-up are compared; without it the click pays for importing cv2
+and numpy and for opening the device.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--init-delay 1.0] [--think 1.5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def open_camera(init_delay):
+    # numpy is imported here, on the capture thread, so it doesn't count against startup
+    import numpy as np
+
+    class SimulatedCamera:
+        """Stands in for cv2.VideoCapture with a 640x480 feed at 30 fps"""
+
+        def __init__(self):
+            self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        def isOpened(self):
+            return True
+
+        def read(self, out=None):
+            time.sleep(1 / 30)
+            self.frame += 1
+            if out is not None and out.shape == self.frame.shape:
+                out[...] = self.frame
+                return True, out
+            return True, self.frame.copy()
+
+        def release(self):
+            pass
+
+    time.sleep(init_delay)
+    return SimulatedCamera()
+
+
+def child(args):
+    """One launch; prints its timings as JSON"""
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QEvent, QEventLoop, QObject, QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    import main as booth
+    imported = time.time()
+
+    def wait_for(condition, timeout=30.0):
+        deadline = time.perf_counter() + timeout
+        loop = QEventLoop()
+        while not condition() and time.perf_counter() < deadline:
+            QTimer.singleShot(1, loop.quit)
+            loop.exec()
+
+    class PaintWatcher(QObject):
+        painted = None
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and self.painted is None:
+                self.painted = time.time()
+            return False
+
+    app = QApplication([])
+    window = booth.VintagePhotobooth(
+        source=lambda: open_camera(args.init_delay), warm_up=not args.no_warm_up)
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    wait_for(lambda: watcher.painted is not None)
+
+    # The guest reads the screen before tapping
+    wait_for(lambda: False, args.think)
+    click = time.perf_counter()
+    window.open_camera_window()
+    camera_window = window.cam_window
+    wait_for(lambda: camera_window.first_frame_ms is not None)
+    first_frame = time.perf_counter()
+    camera_window.close()
+    window.close()
+
+    print(json.dumps({
+        "import_ms": (imported - args.launched) * 1000,
+        "first_paint_ms": (watcher.painted - args.launched) * 1000,
+        "click_to_frame_ms": (first_frame - click) * 1000,
+    }))
+    del app
+
+
+def launch(args, warm_up):
+    command = [sys.executable, os.path.abspath(__file__), "--child",
+               "--launched", repr(time.time()), "--init-delay", str(args.init_delay),
+               "--think", str(args.think)]
+    if not warm_up:
+        command.append("--no-warm-up")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--init-delay", type=float, default=1.0, help="simulated device open time in seconds")
+    parser.add_argument("--think", type=float, default=1.5, help="seconds between first paint and the click")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--launched", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--no-warm-up", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    print(f"{args.repeat} launches each, {args.init_delay:.1f}s simulated camera init, "
+          f"click {args.think:.1f}s after first paint")
+    print(f"{'':<12} {'import main':>12} {'first paint':>12} {'click->frame':>13}")
+    for name, warm_up in (("warm-up", True), ("no warm-up", False)):
+        runs = [launch(args, warm_up) for _ in range(args.repeat)]
+        print(f"{name:<12} {median([r['import_ms'] for r in runs]):>10.0f}ms "
+              f"{median([r['first_paint_ms'] for r in runs]):>10.0f}ms "
+              f"{median([r['click_to_frame_ms'] for r in runs]):>11.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
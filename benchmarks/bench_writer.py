@@ -0,0 +1,73 @@
+"""Encode and write latency of the background strip writer.
+
+Queues a burst of strips for each encoder setting and reports how long
+submitting took (the time the booth is blocked), the deepest the queue
+got, and the writer's mean encode and write times.
+
+    python benchmarks/bench_writer.py [--count 10] [--dpi 300]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from photobooth.cache import FilterCache
+from photobooth.filters import array_to_qimage
+from photobooth.pipeline import RenderSettings, render_strip
+from photobooth.writer import EncoderSettings, StripWriter
+
+ENCODERS = [
+    EncoderSettings("png", png_level=1),
+    EncoderSettings("png", png_level=6),
+    EncoderSettings("png", png_level=9),
+    EncoderSettings("jpg", quality=90),
+    EncoderSettings("webp", quality=80),
+]
+
+
+def make_strip(dpi):
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    sources = [array_to_qimage(np.ascontiguousarray(np.repeat(np.repeat(small, 20, 0), 20, 1)))
+               for _ in range(3)]
+    size = RenderSettings(export_dpi=dpi).strip_size()
+    return render_strip(sources, "sepia", "#723A03", "#FFFDD0", size, cache=FilterCache(max_bytes=0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10, help="strips queued per encoder")
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    strip = make_strip(args.dpi)
+    print(f"{args.count} strips of {strip.width()}x{strip.height()} per encoder")
+    print(f"{'encoder':<10} {'submit':>9} {'max depth':>10} {'encode':>9} {'write':>9} {'size':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for encoder in ENCODERS:
+            setting = encoder.png_level if encoder.fmt == "png" else encoder.quality
+            writer = StripWriter(directory, encoder, prefix=f"{encoder.fmt}{setting}")
+            start = time.perf_counter()
+            deepest = 0
+            paths = []
+            for _ in range(args.count):
+                paths.append(writer.submit(QImage(strip), args.dpi))
+                deepest = max(deepest, writer.depth)
+            submit_ms = (time.perf_counter() - start) * 1000 / args.count
+            writer.close()
+            stats = writer.stats()
+            size_kb = sum(os.path.getsize(p) for p in paths) / len(paths) / 1024
+            print(f"{encoder.fmt + str(setting):<10} {submit_ms:>7.2f}ms {deepest:>10} "
+                  f"{stats['encode_ms']:>7.1f}ms {stats['write_ms']:>7.1f}ms {size_kb:>7.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Resident memory helpers for the benchmark scripts.
+
+On Linux the peak (VmHWM) can be reset through /proc/self/clear_refs, so a
+benchmark can measure the peak of one phase instead of the whole process.
+Elsewhere these fall back to getrusage, which never resets.
+"""
+
+import resource
+
+
+def _status_kb(field):
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak():
+    """Start a new peak measurement; returns the current RSS in KB"""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+    current = _status_kb("VmRSS")
+    return current if current is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_kb():
+    peak = _status_kb("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -1,14 +1,34 @@
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton,
     QVBoxLayout, QHBoxLayout, QFileDialog,
-    QButtonGroup, QRadioButton
+    QButtonGroup, QRadioButton, QCheckBox, QProgressBar, QStackedWidget
 )
 from PyQt6.QtGui import QFont, QPixmap, QImage, QPainter, QColor
 from PyQt6.QtCore import Qt, QTimer
-import cv2
+import importlib
+import logging
 import sys
-import os
-import numpy as np
+import threading
+import time
+from collections import deque
+from functools import partial
+
+# Only Qt-backed modules are imported up front. The modules built on cv2 and
+# numpy are imported where they are first used, so the home screen shows
+# without waiting for them; VintagePhotobooth.warm_up loads them early in
+# the background.
+from photobooth.loader import LoadError, load_image
+from photobooth.trace import TRACER, count, percentile, span
+from photobooth.workers import FairPool, TaskBatch, ThreadCallback
+
+# Imported by the background warm-up, in dependency order
+HEAVY_MODULES = ("photobooth.camera", "photobooth.burst", "photobooth.preview",
+                 "photobooth.pipeline", "photobooth.export", "photobooth.writer")
+
+
+def session_pool(session):
+    """Where a screen's render work runs: its booth's lane when booths share a process, else Qt's pool"""
+    return session.pool if session is not None else None
 
 # ---------------------- DownloadSuccessWindow ----------------------
 
@@ -52,19 +72,31 @@ class DownloadSuccessWindow(QWidget):
 
 # ---------------------- FilterWindow ----------------------
 
+# Filter preview thumbnails: the photo size and the framed card around it
+THUMB_SIZE = (56, 40)
+THUMB_CARD = (64, 48)
+
+
 class FilterWindow(QWidget):
-    def __init__(self, images):
+    def __init__(self, images, selected_filter="sepia", session=None, archive_id=None):
         super().__init__()
+        self.session = session
+        # Set when re-rendering an archived session's frames
+        self.archive_id = archive_id
         self.setWindowTitle("Choose Filter")
         self.setFixedSize(420, 420)
         self.setStyleSheet("background-color: #FFFDD0;")
         self.images = images
-        self.selected_filter = "sepia"
+        self.selected_filter = selected_filter
         self.strip_color = "#723A03"
         self.bg_color = "#FFFDD0"
+        self.thumbnails = {}
+        self.thumb_batch = None
         self.initUI()
 
     def initUI(self):
+        from photobooth.filters import FILTERS
+
         layout = QVBoxLayout()
         layout.setSpacing(10)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -75,21 +107,49 @@ class FilterWindow(QWidget):
         heading.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(heading)
 
-        # Filter choices
-        filters = ["sepia", "bw", "warm", "yellow"]
+        # Filter choices, one per registered filter
+        self.filter_names = list(FILTERS)
+        base, *effects = self.selected_filter.split("+")
         filter_layout = QHBoxLayout()
         self.filter_buttons = QButtonGroup()
+        self.thumb_labels = []
 
-        for f in filters:
-            btn = QRadioButton(f.upper())
+        for f in self.filter_names:
+            btn = QRadioButton(FILTERS.label(f))
             btn.setFont(QFont("Georgia", 10))
-            if f == "sepia":
+            if f == base:
                 btn.setChecked(True)
             self.filter_buttons.addButton(btn)
-            filter_layout.addWidget(btn)
+
+            # Preview of the first photo under this filter, filled in the background
+            thumb = QLabel()
+            thumb.setFixedSize(*THUMB_CARD)
+            thumb.setStyleSheet("background-color: #D3D3D3; border-radius: 6px;")
+            thumb.mousePressEvent = lambda event, b=btn: b.setChecked(True)
+            self.thumb_labels.append(thumb)
+
+            column = QVBoxLayout()
+            column.setSpacing(4)
+            column.addWidget(thumb, alignment=Qt.AlignmentFlag.AlignCenter)
+            column.addWidget(btn, alignment=Qt.AlignmentFlag.AlignCenter)
+            filter_layout.addLayout(column)
 
         layout.addLayout(filter_layout)
 
+        # Vintage effects stacked on top of the filter
+        self.effect_names = FILTERS.effects()
+        self.effect_boxes = []
+        effects_layout = QHBoxLayout()
+        for e in self.effect_names:
+            box = QCheckBox(FILTERS.label(e))
+            box.setFont(QFont("Georgia", 9))
+            box.setStyleSheet("color: #723A03;")
+            box.setChecked(e in effects)
+            box.toggled.connect(lambda checked: self.render_thumbnails())
+            self.effect_boxes.append(box)
+            effects_layout.addWidget(box)
+        layout.addLayout(effects_layout)
+
         # Strip color
         strip_label = QLabel("Strip color")
         strip_label.setFont(QFont("Segoe Script", 14))
@@ -184,10 +244,63 @@ class FilterWindow(QWidget):
         layout.addWidget(next_button)
 
         self.setLayout(layout)
+        self.render_thumbnails()
+
+    def selected_effects(self):
+        return [e for e, box in zip(self.effect_names, self.effect_boxes) if box.isChecked()]
+
+    def cancel_thumbnails(self):
+        if self.thumb_batch is not None:
+            self.thumb_batch.cancel()
+            self.thumb_batch = None
+
+    def render_thumbnails(self):
+        """Filter one small copy of the first photo under every filter, off the GUI thread"""
+        from photobooth.filters import filter_thumbnails
+
+        self.cancel_thumbnails()
+        if not self.images:
+            return
+        first = self.images[0]
+        image = first.toImage() if isinstance(first, QPixmap) else first
+        names = ["+".join([f] + self.selected_effects()) for f in self.filter_names]
+        batch = TaskBatch(filter_thumbnails, [(image, names, THUMB_SIZE)],
+                          pool=session_pool(self.session), parent=self)
+        batch.error.connect(lambda index, message: print(message, file=sys.stderr))
+        batch.finished.connect(lambda results: self.show_thumbnails(names, results[0]))
+        batch.start()
+        self.thumb_batch = batch
+
+    def show_thumbnails(self, names, thumbs):
+        self.thumb_batch = None
+        if thumbs is None:
+            return
+        self.thumbnails = {f: thumbs[name] for f, name in zip(self.filter_names, names)}
+        self.composite_thumbnails()
+
+    def composite_thumbnails(self):
+        """Frame the filtered thumbnails in the chosen colors; nothing is refiltered"""
+        for name, thumb in zip(self.filter_names, self.thumb_labels):
+            image = self.thumbnails.get(name)
+            if image is None:
+                continue
+            card = QImage(*THUMB_CARD, QImage.Format.Format_ARGB32_Premultiplied)
+            card.fill(QColor(self.bg_color))
+            painter = QPainter(card)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setBrush(QColor(self.strip_color))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.drawRoundedRect(0, 0, THUMB_CARD[0], THUMB_CARD[1], 6, 6)
+            painter.drawImage((THUMB_CARD[0] - image.width()) // 2,
+                              (THUMB_CARD[1] - image.height()) // 2, image)
+            painter.end()
+            thumb.setPixmap(QPixmap.fromImage(card))
 
     def update_strip_selection(self, idx, checked):
         if checked:
             strip_colors = ["#723A03", "#F5DEB3", "#A0522D", "#8B4513"]
+            self.strip_color = strip_colors[idx]
+            self.composite_thumbnails()
             # Update all buttons
             for i, button in enumerate(self.strip_color_buttons.buttons()):
                 color = strip_colors[i]
@@ -214,6 +327,8 @@ class FilterWindow(QWidget):
     def update_bg_selection(self, idx, checked):
         if checked:
             bg_colors = ["#FFFDD0", "#F0E68C", "#FFDAB9", "#FFE4B5"]
+            self.bg_color = bg_colors[idx]
+            self.composite_thumbnails()
             # Update all buttons
             for i, button in enumerate(self.bg_color_buttons.buttons()):
                 color = bg_colors[i]
@@ -238,146 +353,94 @@ class FilterWindow(QWidget):
                     """)
 
     def go_to_final(self):
-        self.selected_filter = self.filter_buttons.checkedButton().text().lower()
-        strip_idx = self.strip_color_buttons.checkedId()
-        bg_idx = self.bg_color_buttons.checkedId()
-        self.strip_color = ["#723A03", "#F5DEB3", "#A0522D", "#8B4513"][strip_idx]
-        self.bg_color = ["#FFFDD0", "#F0E68C", "#FFDAB9", "#FFE4B5"][bg_idx]
-        self.final_window = FinalDisplayWindow(self.images, self.selected_filter, self.strip_color, self.bg_color)
+        checked = self.filter_buttons.checkedButton()
+        base = self.filter_names[self.filter_buttons.buttons().index(checked)]
+        # e.g. "sepia+grain+vignette"; the registry compiles the combination into one chain
+        self.selected_filter = "+".join([base] + self.selected_effects())
+        # strip_color and bg_color follow the color buttons as they are toggled
+        if self.session is not None:
+            self.session.show_final(self.images, self.selected_filter, self.strip_color, self.bg_color)
+            return
+        self.final_window = FinalDisplayWindow(self.images, self.selected_filter, self.strip_color,
+                                               self.bg_color, archive_id=self.archive_id)
         self.final_window.show()
         self.close()
 
+    def reset(self, images, selected_filter="sepia"):
+        """Prepare the screen for a new guest without rebuilding it"""
+        self.images = images
+        self.selected_filter = selected_filter
+        # The last guest's thumbnails go before anything can composite them again
+        self.thumbnails = {}
+        for thumb in self.thumb_labels:
+            thumb.clear()
+        base, *effects = selected_filter.split("+")
+        for name, btn in zip(self.filter_names, self.filter_buttons.buttons()):
+            btn.setChecked(name == base)
+        for name, box in zip(self.effect_names, self.effect_boxes):
+            box.setChecked(name in effects)
+        self.strip_color_buttons.buttons()[0].setChecked(True)
+        self.bg_color_buttons.buttons()[0].setChecked(True)
+        self.render_thumbnails()
+
 # ---------------------- FinalDisplayWindow ----------------------
 
 class FinalDisplayWindow(QWidget):
-    def __init__(self, images, selected_filter, strip_color, bg_color):
+    def __init__(self, images, selected_filter, strip_color, bg_color, settings=None, session=None,
+                 archive_id=None):
         super().__init__()
+        self.session = session
+        self.archive_id = archive_id
+        # Save clicks by the path their strip is written to, for the booth's latency
+        self.saves_started = {}
         self.setWindowTitle("Final Strip")
         self.setFixedSize(420, 420)
         self.images = images
         self.strip_color = strip_color
         self.bg_color = bg_color
         self.selected_filter = selected_filter
+        if settings is None:
+            from photobooth.pipeline import RenderSettings
+            settings = RenderSettings.from_env()
+        self.settings = settings
         self.setStyleSheet(f"background-color: {self.bg_color};")
         self.initUI()
 
-    def apply_sepia_filter(self, pixmap):
-        """Apply sepia filter to pixmap"""
-        image = pixmap.toImage()
-        width, height = image.width(), image.height()
-        
-        for x in range(width):
-            for y in range(height):
-                pixel = image.pixel(x, y)
-                r, g, b = (pixel >> 16) & 255, (pixel >> 8) & 255, pixel & 255
-                
-                # Sepia formula
-                tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                tb = int(0.272 * r + 0.534 * g + 0.131 * b)
-                
-                # Clamp values
-                tr = min(255, tr)
-                tg = min(255, tg)
-                tb = min(255, tb)
-                
-                new_pixel = (255 << 24) | (tr << 16) | (tg << 8) | tb
-                image.setPixel(x, y, new_pixel)
-        
-        return QPixmap.fromImage(image)
-
-    def apply_bw_filter(self, pixmap):
-        """Apply black and white filter to pixmap"""
-        image = pixmap.toImage()
-        width, height = image.width(), image.height()
-        
-        for x in range(width):
-            for y in range(height):
-                pixel = image.pixel(x, y)
-                r, g, b = (pixel >> 16) & 255, (pixel >> 8) & 255, pixel & 255
-                
-                # Grayscale formula
-                gray = int(0.299 * r + 0.587 * g + 0.114 * b)
-                
-                new_pixel = (255 << 24) | (gray << 16) | (gray << 8) | gray
-                image.setPixel(x, y, new_pixel)
-        
-        return QPixmap.fromImage(image)
-
-    def apply_warm_filter(self, pixmap):
-        """Apply warm filter to pixmap"""
-        image = pixmap.toImage()
-        width, height = image.width(), image.height()
-        
-        for x in range(width):
-            for y in range(height):
-                pixel = image.pixel(x, y)
-                r, g, b = (pixel >> 16) & 255, (pixel >> 8) & 255, pixel & 255
-                
-                # Warm filter - increase red and reduce blue
-                r = min(255, int(r * 1.2))
-                g = min(255, int(g * 1.1))
-                b = int(b * 0.8)
-                
-                new_pixel = (255 << 24) | (r << 16) | (g << 8) | b
-                image.setPixel(x, y, new_pixel)
-        
-        return QPixmap.fromImage(image)
-
-    def apply_yellow_filter(self, pixmap):
-        """Apply yellow filter to pixmap"""
-        image = pixmap.toImage()
-        width, height = image.width(), image.height()
-        
-        for x in range(width):
-            for y in range(height):
-                pixel = image.pixel(x, y)
-                r, g, b = (pixel >> 16) & 255, (pixel >> 8) & 255, pixel & 255
-                
-                # Yellow filter - increase red and green, reduce blue
-                r = min(255, int(r * 1.15))
-                g = min(255, int(g * 1.15))
-                b = int(b * 0.7)
-                
-                new_pixel = (255 << 24) | (r << 16) | (g << 8) | b
-                image.setPixel(x, y, new_pixel)
-        
-        return QPixmap.fromImage(image)
-
-    def apply_filter(self, pixmap):
-        """Apply the selected filter to the pixmap"""
-        if self.selected_filter == "sepia":
-            return self.apply_sepia_filter(pixmap)
-        elif self.selected_filter == "bw":
-            return self.apply_bw_filter(pixmap)
-        elif self.selected_filter == "warm":
-            return self.apply_warm_filter(pixmap)
-        elif self.selected_filter == "yellow":
-            return self.apply_yellow_filter(pixmap)
-        else:
-            return pixmap
-
     def initUI(self):
+        from photobooth.pipeline import PHOTO_COUNT
+
         layout = QVBoxLayout()
         layout.setSpacing(10)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        for pixmap in self.images:
+        self.img_labels = []
+        for _ in range(PHOTO_COUNT):
             img_label = QLabel()
             img_label.setFixedSize(200, 100)
             img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            img_label.setStyleSheet(f"""
-                background-color: {self.strip_color};
-                border-radius: 20px;
-                padding: 5px;
-            """)
-            # Apply filter before scaling
-            filtered_pixmap = self.apply_filter(pixmap)
-            img_label.setPixmap(filtered_pixmap.scaled(190, 90, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+            img_label.setFont(QFont("Georgia", 10))
+            self.img_labels.append(img_label)
             layout.addWidget(img_label)
+        self.clear_labels()
 
-        save_button = QPushButton("Download")
-        save_button.setStyleSheet("""
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedSize(200, 8)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setStyleSheet("""
+            QProgressBar {
+                background-color: #D3D3D3;
+                border: none;
+                border-radius: 4px;
+            }
+            QProgressBar::chunk {
+                background-color: #723A03;
+                border-radius: 4px;
+            }
+        """)
+        layout.addWidget(self.progress_bar, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        self.save_button = QPushButton("Download")
+        self.save_button.setStyleSheet("""
             QPushButton {
                 background-color: #723A03;
                 color: #FFFDD0;
@@ -391,31 +454,182 @@ class FinalDisplayWindow(QWidget):
                 background-color: #8B5E3C;
             }
         """)
-        save_button.clicked.connect(self.save_image)
-        layout.addWidget(save_button)
+        self.save_button.clicked.connect(self.save_image)
+        layout.addWidget(self.save_button)
+        self.on_saved = ThreadCallback(self.show_saved, parent=self)
 
         self.setLayout(layout)
+        self.render_preview()
+
+    def clear_labels(self):
+        for img_label in self.img_labels:
+            img_label.clear()
+            img_label.setText("developing...")
+        self.style_labels()
+
+    def style_labels(self):
+        for img_label in self.img_labels:
+            img_label.setStyleSheet(f"""
+                background-color: {self.strip_color};
+                color: {self.bg_color};
+                border-radius: 20px;
+                padding: 5px;
+            """)
+
+    def set_colors(self, strip_color, bg_color):
+        """Recolor the strip; the filtered photos, on screen and cached, are kept"""
+        self.strip_color = strip_color
+        self.bg_color = bg_color
+        self.setStyleSheet(f"background-color: {self.bg_color};")
+        self.style_labels()
+
+    def release(self):
+        """Drop the session's photos and ignore anything still running for it"""
+        for name in ("preview_batch", "save_batch"):
+            batch = getattr(self, name, None)
+            if batch is not None:
+                batch.cancel()
+                setattr(self, name, None)
+        self.images = []
+        self.source_images = []
+        self.source_keys = []
+
+    def reset(self, images, selected_filter, strip_color, bg_color):
+        """Show a new guest's photos, dropping anything still running for the last one"""
+        if images and images is self.images and selected_filter == self.selected_filter:
+            # Same photos and filter: only the colors can differ
+            self.set_colors(strip_color, bg_color)
+            return
+        self.release()
+        self.archive_id = None
+        self.images = images
+        self.selected_filter = selected_filter
+        self.strip_color = strip_color
+        self.bg_color = bg_color
+        self.setStyleSheet(f"background-color: {self.bg_color};")
+        self.save_button.setEnabled(True)
+        self.clear_labels()
+        self.render_preview()
+
+    def render_tasks(self, size):
+        """Arguments for one render_photo task per image"""
+        return [
+            (source, self.selected_filter, size, self.settings, key)
+            for source, key in zip(self.source_images, self.source_keys)
+        ]
+
+    def start_batch(self, func, items, on_finished):
+        batch = TaskBatch(func, items, pool=session_pool(self.session), parent=self)
+        batch.progress.connect(self.update_progress)
+        batch.error.connect(lambda index, message: print(message, file=sys.stderr))
+        batch.finished.connect(on_finished)
+        self.progress_bar.setRange(0, len(items))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(bool(items))
+        batch.start()
+        return batch
+
+    def update_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        if done == total:
+            self.progress_bar.hide()
+
+    def render_preview(self):
+        """Filter the preview photos in the background, filling labels as they finish"""
+        from photobooth.cache import image_key
+        from photobooth.pipeline import PREVIEW_SIZE, render_photo
+
+        # Camera shots arrive as QImages over the session buffer, uploads as pixmaps
+        self.source_images = [image if isinstance(image, QImage) else image.toImage()
+                              for image in self.images]
+        self.source_keys = [image_key(image) for image in self.images]
+        self.preview_batch = self.start_batch(
+            render_photo, self.render_tasks(PREVIEW_SIZE), lambda photos: None)
+        self.preview_batch.result.connect(self.show_preview_photo)
+
+    def show_preview_photo(self, index, image):
+        self.img_labels[index].setPixmap(QPixmap.fromImage(image))
+
+    def strip_writer(self):
+        """The booth's own writer when booths share a process, else the shared one"""
+        from photobooth.writer import default_writer
+
+        if self.session is not None and self.session.writer is not None:
+            return self.session.writer
+        return default_writer()
 
     def save_image(self):
-        strip_image = QImage(220, 330, QImage.Format.Format_RGB32)
-        strip_image.fill(QColor(self.bg_color))
-        painter = QPainter(strip_image)
-        y = 10
-        for pixmap in self.images:
-            painter.setBrush(QColor(self.strip_color))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawRoundedRect(10, y, 200, 100, 20, 20)
-            # Apply filter before saving
-            filtered_pixmap = self.apply_filter(pixmap)
-            scaled = filtered_pixmap.scaled(190, 90, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            painter.drawPixmap(15, y + 5, scaled)
-            y += 110
-        painter.end()
-
-        downloads = os.path.join(os.path.expanduser("~"), "Downloads")
-        path = os.path.join(downloads, "photostrip.png")
-        strip_image.save(path)
-        
+        from photobooth.export import export_strip
+        from photobooth.pipeline import render_photo
+
+        self.save_button.setEnabled(False)
+        self.save_started = time.perf_counter()
+        if self.settings.banded:
+            # Print sizes and scaled exports are rendered in bands straight to the encoder to bound memory.
+            # The job keeps its own references; this screen may move on before it runs.
+            encoder = self.strip_writer().encoder
+            self.queue_strip(partial(
+                export_strip, list(self.source_images), self.selected_filter, self.strip_color,
+                self.bg_color, settings=self.settings, keys=list(self.source_keys),
+                quality=encoder.quality, png_level=encoder.png_level))
+            return
+        photo_size = self.settings.layout().photo_size
+        self.save_batch = self.start_batch(
+            render_photo, self.render_tasks(photo_size), self.compose_photos)
+
+    def compose_photos(self, photos):
+        """Compose the strip on the pool once every photo is rendered"""
+        from photobooth.pipeline import compose_strip
+
+        if None in photos:
+            self.save_button.setEnabled(True)
+            return
+        item = (photos, self.strip_color, self.bg_color, self.settings)
+        self.save_batch = self.start_batch(compose_strip, [item], self.queue_strip)
+
+    def queue_strip(self, result):
+        """Hand the strip to the background writer; the booth is free again right away"""
+        from photobooth.archive import default_archive
+        from photobooth.spooler import default_spooler
+
+        # Click to hand-off; encoding and writing are traced by the writer
+        TRACER.record("strip.render", self.save_started, time.perf_counter())
+        count("strips")
+        on_done = self.on_saved
+        archive = default_archive()
+        if archive is not None:
+            # The frames and the written strip are archived on the writer thread
+            on_done = archive.after_write(
+                self.source_images, self.selected_filter, self.strip_color, self.bg_color,
+                frames_from=self.archive_id, then=self.on_saved)
+        spooler = default_spooler()
+        if spooler is not None:
+            # Blocks the writer thread, not the booth, while the printer or share kiosk catches up
+            on_done = spooler.after_write(then=on_done)
+        writer = self.strip_writer()
+        path = None
+        if callable(result):
+            path = writer.submit_render(result, on_done=on_done)
+            self.saves_started[path] = self.save_started
+        elif result[0] is not None:
+            path = writer.submit(result[0], self.settings.export_dpi, on_done=on_done)
+            self.saves_started[path] = self.save_started
+        self.save_button.setEnabled(True)
+        if self.session is not None:
+            self.session.finish(path)
+
+    def show_saved(self, path, error):
+        started = self.saves_started.pop(path, None)
+        if self.session is not None:
+            self.session.strip_written(path)
+        if self.session is not None and started is not None:
+            self.session.strip_saved((time.perf_counter() - started) * 1000)
+        if error is not None:
+            print(f"could not save {path}: {error}", file=sys.stderr)
+            return
+        if self.session is not None:
+            # The next guest already has the screen
+            return
         # Show success window
         self.success_window = DownloadSuccessWindow()
         self.success_window.show()
@@ -423,11 +637,16 @@ class FinalDisplayWindow(QWidget):
 # ---------------------- UploadWindow ----------------------
 
 class UploadWindow(QWidget):
-    def __init__(self):
+    def __init__(self, settings=None, session=None):
         super().__init__()
+        self.session = session
         self.setWindowTitle("Upload Pictures")
         self.setFixedSize(420, 420)
         self.setStyleSheet("background-color: #FFFDD0;")
+        if settings is None:
+            from photobooth.pipeline import RenderSettings
+            settings = RenderSettings.from_env()
+        self.settings = settings
         self.initUI()
 
     def initUI(self):
@@ -479,31 +698,206 @@ class UploadWindow(QWidget):
             file_dialog = QFileDialog()
             file_path, _ = file_dialog.getOpenFileName(self, "Select Image", "", "Images (*.png *.jpg *.jpeg *.bmp)")
             if file_path:
-                pixmap = QPixmap(file_path).scaled(label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                label.setPixmap(pixmap)
-                self.pixmaps.append(QPixmap(file_path))
+                # One read and one decode, at the largest size the strip or a later reprint
+                # needs; only the thumbnail is scaled down to the label
+                thumbnail_box = (label.width(), label.height())
+                try:
+                    loaded = load_image(file_path, self.settings.source_boxes(), thumbnail_box)
+                except LoadError as exc:
+                    print(exc, file=sys.stderr)
+                    return
+                label.setPixmap(QPixmap.fromImage(loaded.thumbnail))
+                self.pixmaps.append(QPixmap.fromImage(loaded.image))
         return handler
 
     def open_filter_window(self):
         if len(self.pixmaps) >= 3:
+            if self.session is not None:
+                self.session.show_filters(self.pixmaps[:3])
+                return
             self.filter_window = FilterWindow(self.pixmaps[:3])
             self.filter_window.show()
             self.close()
 
+    def reset(self):
+        self.pixmaps = []
+        for label in self.image_labels:
+            label.clear()
+
+# ---------------------- GalleryWindow ----------------------
+
+GALLERY_COLUMNS = 4
+GALLERY_THUMB = (90, 135)
+
+
+class GalleryWindow(QWidget):
+    """Pages through archived strips, newest first; clicking one re-renders its frames.
+
+    Only the thumbnails of the visible page are read from the archive.
+    """
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self.setWindowTitle("Gallery")
+        self.setFixedSize(420, 420)
+        self.setStyleSheet("background-color: #FFFDD0;")
+        # First id of every page before the current one, for going back
+        self.page_starts = []
+        self.page_ids = []
+        self.initUI()
+        self.show_page(None)
+
+    def initUI(self):
+        from photobooth.archive import PAGE_SIZE
+
+        layout = QVBoxLayout()
+        layout.setSpacing(10)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        heading = QLabel("Gallery")
+        heading.setFont(QFont("Segoe Script", 16))
+        heading.setStyleSheet("color: #723A03;")
+        heading.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(heading)
+
+        grid = QVBoxLayout()
+        grid.setSpacing(8)
+        self.thumb_labels = []
+        row = None
+        for i in range(PAGE_SIZE):
+            if i % GALLERY_COLUMNS == 0:
+                row = QHBoxLayout()
+                row.setSpacing(8)
+                grid.addLayout(row)
+            label = QLabel()
+            label.setFixedSize(*GALLERY_THUMB)
+            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            label.setStyleSheet("border-radius: 8px;")
+            label.mousePressEvent = lambda event, index=i: self.open_session(index)
+            self.thumb_labels.append(label)
+            row.addWidget(label)
+        layout.addLayout(grid)
+
+        nav_style = """
+            QPushButton {
+                background-color: #723A03;
+                color: #FFFDD0;
+                padding: 6px 16px;
+                border: none;
+                border-radius: 12px;
+                font-family: 'Georgia';
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #8B5E3C;
+            }
+            QPushButton:disabled {
+                background-color: #D3D3D3;
+            }
+        """
+        self.newer_button = QPushButton("Newer")
+        self.older_button = QPushButton("Older")
+        self.page_label = QLabel()
+        self.page_label.setFont(QFont("Georgia", 10))
+        self.page_label.setStyleSheet("color: #723A03;")
+        self.page_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        for button in (self.newer_button, self.older_button):
+            button.setStyleSheet(nav_style)
+        self.newer_button.clicked.connect(self.newer_page)
+        self.older_button.clicked.connect(self.older_page)
+
+        nav = QHBoxLayout()
+        nav.addWidget(self.newer_button)
+        nav.addWidget(self.page_label)
+        nav.addWidget(self.older_button)
+        layout.addLayout(nav)
+        self.setLayout(layout)
+
+    def show_page(self, before):
+        """Show the sessions older than the id before, or the newest ones for None"""
+        rows = self.archive.page(before, len(self.thumb_labels))
+        self.page_ids = [row[0] for row in rows]
+        for label, row in zip(self.thumb_labels, rows + [None] * len(self.thumb_labels)):
+            label.clear()
+            if row is None:
+                label.setCursor(Qt.CursorShape.ArrowCursor)
+                continue
+            thumb = row[3]
+            if not thumb.isNull():
+                label.setPixmap(QPixmap.fromImage(thumb).scaled(
+                    GALLERY_THUMB[0], GALLERY_THUMB[1], Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation))
+            else:
+                label.setText(row[2])
+            label.setToolTip(time.strftime("%Y-%m-%d %H:%M", time.localtime(row[1])))
+            label.setCursor(Qt.CursorShape.PointingHandCursor)
+        if not rows:
+            self.page_label.setText("No strips yet" if before is None else "")
+        else:
+            first = len(self.page_starts) * len(self.thumb_labels) + 1
+            self.page_label.setText(f"{first}-{first + len(rows) - 1} of {len(self.archive)}")
+        self.current_before = before
+        self.newer_button.setEnabled(bool(self.page_starts))
+        self.older_button.setEnabled(
+            len(rows) == len(self.thumb_labels) and bool(self.archive.page(rows[-1][0], 1)))
+
+    def older_page(self):
+        if self.page_ids:
+            self.page_starts.append(self.current_before)
+            self.show_page(self.page_ids[-1])
+
+    def newer_page(self):
+        if self.page_starts:
+            self.show_page(self.page_starts.pop())
+
+    def open_session(self, index):
+        if index >= len(self.page_ids):
+            return
+        session = self.archive.session(self.page_ids[index])
+        frames = self.archive.frames(session.id)
+        if not frames:
+            print(f"session {session.id} has no archived frames", file=sys.stderr)
+            return
+        from photobooth.filters import FILTERS
+
+        # Filters loaded from files that are gone now fall back to the default
+        selected = session.filter_name if session.filter_name in FILTERS else "sepia"
+        self.filter_window = FilterWindow(frames, selected, archive_id=session.frames_id)
+        self.filter_window.show()
+
 # ---------------------- CameraWindow ----------------------
 
+# How long before the shutter the burst starts recording
+BURST_LEAD_MS = 250
+
+
 class CameraWindow(QWidget):
-    def __init__(self):
+    def __init__(self, source=0, camera=None, session=None, burst=None, owns_camera=None):
+        init_start = time.perf_counter()
+        from photobooth.burst import BurstRecorder, BurstSettings
+        from photobooth.camera import CameraCapture, SessionFrames
+        from photobooth.filters import FILTERS
+        from photobooth.preview import PreviewLabel
+
         super().__init__()
+        self.session = session
         self.setWindowTitle("Camera View")
         self.setFixedSize(420, 420)
         self.setStyleSheet("background-color: #FFFDD0;")
         self.image_count = 0
-        self.captured_images = []
+        # Shots are copied out of the camera ring into one preallocated buffer
+        self.frames = SessionFrames(3)
+        # Each shot keeps the best of a short burst around the shutter
+        self.burst_settings = burst or BurstSettings.from_env()
+        self.burst = BurstRecorder(self.burst_settings)
+        # Bursts still being scored, oldest first
+        self.score_batches = []
+        self.shots_pending = 0
         self.countdown_active = False
         self.countdown_value = 3
 
-        self.camera_frame = QLabel()
+        self.camera_frame = PreviewLabel()
         self.camera_frame.setFixedSize(400, 400)
         self.camera_frame.setStyleSheet("""
             background-color: #D3D3D3;
@@ -534,7 +928,46 @@ class CameraWindow(QWidget):
         self.countdown_label.setParent(self.camera_frame)
         self.countdown_label.move(0, 0)
 
-        self.capture = cv2.VideoCapture(0)
+        # Capture FPS and dropped-frame counters
+        self.stats_label = QLabel(self.camera_frame)
+        self.stats_label.setFixedSize(388, 20)
+        self.stats_label.setStyleSheet("""
+            background-color: transparent;
+            border: none;
+            color: #723A03;
+            font-size: 11px;
+            font-family: 'Georgia';
+        """)
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.stats_label.move(0, 370)
+
+        # Live filter choice, drawn over the top of the camera frame
+        self.live_filter = None
+        filter_bar = QWidget(self.camera_frame)
+        filter_bar.setFixedSize(400, 36)
+        filter_bar.setStyleSheet("background-color: transparent; border: none;")
+        filter_bar.move(0, 10)
+        filter_layout = QHBoxLayout(filter_bar)
+        filter_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.live_filter_buttons = QButtonGroup(self)
+        for f in [None] + list(FILTERS):
+            btn = QRadioButton(FILTERS.label(f) if f else "NONE")
+            btn.setFont(QFont("Georgia", 9))
+            btn.setStyleSheet("color: #723A03; border: none;")
+            btn.setChecked(f is None)
+            btn.toggled.connect(lambda checked, name=f: checked and self.set_live_filter(name))
+            self.live_filter_buttons.addButton(btn)
+            filter_layout.addWidget(btn)
+
+        # Frames are read on a background thread; the timer only picks up the newest one.
+        # A kiosk passes in its long-lived camera so the device is opened only once;
+        # the home screen hands over the camera it warmed up, along with ownership.
+        self.owns_camera = camera is None if owns_camera is None else owns_camera
+        self.camera = camera or CameraCapture(source).start()
+        self.last_frame_seq = -1
+        self.preview = None
+        self.started_at = time.perf_counter()
+        self.first_frame_ms = None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         self.timer.start(30)
@@ -544,20 +977,49 @@ class CameraWindow(QWidget):
         self.countdown_timer.timeout.connect(self.update_countdown)
 
         self.camera_frame.mousePressEvent = self.start_countdown
+        TRACER.record("camera.window", init_start, time.perf_counter())
 
     def update_frame(self):
-        if self.capture.isOpened() and not self.countdown_active:
-            ret, frame = self.capture.read()
-            if ret:
-                self.current_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = self.current_frame.shape
-                bytes_per_line = ch * w
-                image = QImage(self.current_frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                self.camera_frame.setPixmap(QPixmap.fromImage(image))
+        self.update_stats()
+        self.prepare_frames()
+        seq, frame = self.camera.latest()
+        if frame is not None and seq != self.last_frame_seq:
+            if self.preview is None:
+                from photobooth.preview import PreviewRenderer
+                box = self.camera_frame.contentsRect()
+                self.preview = PreviewRenderer(box.width(), box.height())
+                self.preview.set_filter(self.live_filter)
+            # Resized into a reused buffer; no per-frame allocations
+            with span("preview.frame"):
+                image = self.preview.render(frame)
+            if self.camera.intact(seq):
+                self.last_frame_seq = seq
+                self.camera_frame.setImage(image)
+                count("preview.frames")
+                if self.first_frame_ms is None:
+                    now = time.perf_counter()
+                    self.first_frame_ms = (now - self.started_at) * 1000
+                    TRACER.record("camera.first_frame", self.started_at, now)
+                    if self.session is not None:
+                        self.session.first_frame(self.first_frame_ms)
+
+    def prepare_frames(self):
+        """Allocate the session buffer once the camera has settled on the size shots are taken at"""
+        camera = self.camera
+        mode = camera.still_mode if camera.config.still is not None else camera.preview_mode
+        if mode is not None and mode.area:
+            self.frames.allocate(mode.size)
+
+    def set_live_filter(self, name):
+        self.live_filter = name
+        if self.preview is not None:
+            self.preview.set_filter(name)
 
     def start_countdown(self, event):
-        if self.image_count < 3 and not self.countdown_active:
+        if self.image_count + self.shots_pending < 3 and not self.countdown_active:
             self.countdown_active = True
+            # The switch to the still size happens during the countdown, not at the shutter
+            self.camera.use_still()
             self.countdown_value = 3
             self.countdown_label.show()
             self.countdown_label.setText(str(self.countdown_value))
@@ -565,6 +1027,8 @@ class CameraWindow(QWidget):
 
     def update_countdown(self):
         self.countdown_value -= 1
+        if self.countdown_value == 1:
+            QTimer.singleShot(1000 - BURST_LEAD_MS, self.arm_burst)
         if self.countdown_value > 0:
             self.countdown_label.setText(str(self.countdown_value))
         else:
@@ -573,28 +1037,127 @@ class CameraWindow(QWidget):
             self.capture_image()
             self.countdown_active = False
 
+    def arm_burst(self):
+        """Start recording the frames leading up to the shutter"""
+        if not self.countdown_active:
+            return
+        if self.score_batches:
+            # The last burst is still being scored; don't record over it
+            from photobooth.burst import BurstRecorder
+            self.burst = BurstRecorder(self.burst_settings)
+        self.burst.arm()
+        self.camera.burst = self.burst
+
     def capture_image(self):
-        if hasattr(self, 'current_frame') and self.image_count < 3:
-            image = QImage(self.current_frame.data, self.current_frame.shape[1], self.current_frame.shape[0], self.current_frame.shape[1]*3, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(image)
-            self.captured_images.append(pixmap)
-            self.image_count += 1
-            
+        """Release the shutter and pick the best frame of the burst on the pool"""
+        if self.camera.burst is None:
+            # Countdowns shorter than the arming point still get a burst
+            self.arm_burst()
+        burst = self.burst
+        burst.shutter()
+        self.shots_pending += 1
+        self.score_batches.append(self.score_burst(burst))
+
+    def score_burst(self, burst):
+        from photobooth.burst import best_frame
+
+        batch = TaskBatch(best_frame, [(burst,)], pool=session_pool(self.session), parent=self)
+        batch.error.connect(lambda index, message: print(message, file=sys.stderr))
+        batch.finished.connect(lambda results: self.keep_best(burst, batch, results[0]))
+        batch.start()
+        return batch
+
+    def keep_best(self, burst, batch, index):
+        self.shots_pending -= 1
+        if self.camera.burst is burst:
+            self.camera.burst = None
+        if batch in self.score_batches:
+            self.score_batches.remove(batch)
+        batch.deleteLater()
+        if not self.countdown_active:
+            self.camera.use_preview()
+        if self.image_count < 3:
+            # Copied out of the burst ring, which the next shot reuses
+            if index is not None:
+                shot = self.frames.capture(burst.frames()[index])
+            else:
+                # No frames arrived during the burst; fall back to the newest one
+                seq, frame = self.camera.latest()
+                shot = None if frame is None else self.frames.capture(frame, lambda: self.camera.intact(seq))
+            if shot is not None:
+                self.image_count += 1
+
         if self.image_count == 3:
-            self.filter_window = FilterWindow(self.captured_images)
+            # Zero-copy views of the session buffer
+            images = self.frames.images()
+            if self.session is not None:
+                # The booth holds the buffer until the strip made from it is written
+                self.session.show_filters(images, self.live_filter or "sepia", release=self.frames.hold())
+                return
+            self.filter_window = FilterWindow(images, self.live_filter or "sepia")
             self.filter_window.show()
             self.close()
 
+    def stop_shots(self):
+        """Stop the countdown and drop every burst still being scored"""
+        self.countdown_timer.stop()
+        self.countdown_label.hide()
+        self.countdown_active = False
+        for batch in self.score_batches:
+            batch.cancel()
+        self.score_batches = []
+        self.shots_pending = 0
+        self.camera.burst = None
+
+    def reset(self):
+        """Start a new guest's session on the already open camera"""
+        self.stop_shots()
+        self.image_count = 0
+        self.camera.use_preview()
+        self.frames.reset()
+        self.live_filter_buttons.buttons()[0].setChecked(True)
+        self.camera_frame.setImage(None)
+        self.last_frame_seq = -1
+        self.started_at = time.perf_counter()
+        self.first_frame_ms = None
+
+    def update_stats(self):
+        mode = self.camera.mode
+        size = f"{mode.width}x{mode.height}  |  " if mode is not None else ""
+        text = f"{size}{self.camera.fps:.1f} fps  |  {self.camera.dropped} dropped"
+        if self.stats_label.text() != text:
+            self.stats_label.setText(text)
+
+    def showEvent(self, event):
+        if not self.timer.isActive():
+            self.timer.start(30)
+        # Don't wait a timer tick for the first frame
+        self.update_frame()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
     def closeEvent(self, event):
-        if self.capture:
-            self.capture.release()
+        self.timer.stop()
+        self.stop_shots()
+        self.camera.use_preview()
+        if self.owns_camera:
+            self.camera.stop()
         event.accept()
 
 # ---------------------- Main ----------------------
 
 class VintagePhotobooth(QWidget):
-    def __init__(self):
+    def __init__(self, session=None, source=0, warm_up=True):
         super().__init__()
+        self.session = session
+        self.source = source
+        # A kiosk keeps its own camera open; a standalone booth warms one up once shown
+        self.warm_up_camera = warm_up and session is None
+        self.warm_thread = None
+        self.warm_camera = None
         self.setWindowTitle("Vintage Photobooth")
         self.setFixedSize(420, 420)
         self.setStyleSheet("background-color: #FFFDD0; border-radius: 20px;")
@@ -646,20 +1209,304 @@ class VintagePhotobooth(QWidget):
         layout.addWidget(title)
         layout.addWidget(subtitle)
         layout.addLayout(btn_layout)
+        # Past strips are browsable on a personal booth, not between kiosk guests
+        if self.session is None:
+            gallery_btn = QPushButton("Gallery")
+            gallery_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: transparent;
+                    color: #723A03;
+                    border: none;
+                    font-family: 'Georgia';
+                    font-size: 13px;
+                    text-decoration: underline;
+                }
+            """)
+            gallery_btn.clicked.connect(self.open_gallery_window)
+            layout.addSpacing(10)
+            layout.addWidget(gallery_btn, alignment=Qt.AlignmentFlag.AlignCenter)
         layout.setContentsMargins(20, 10, 20, 20)
         layout.setSpacing(5)
         self.setLayout(layout)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.warm_up_camera and self.warm_thread is None:
+            # Queued so the home screen is painted before the warm-up competes for the GIL
+            QTimer.singleShot(0, self.warm_up)
+
+    def warm_up(self):
+        """Import cv2, numpy and the rendering modules and open the camera in the background"""
+        if self.warm_thread is not None:
+            return
+        self.warm_thread = threading.Thread(target=self._warm_up, name="warm-up", daemon=True)
+        self.warm_thread.start()
+
+    def _warm_up(self):
+        with span("startup.warm_up"):
+            for name in HEAVY_MODULES:
+                importlib.import_module(name)
+            from photobooth.camera import CameraCapture
+            self.warm_camera = CameraCapture(self.source).start()
+
+    def take_warm_camera(self):
+        """The camera opened by warm_up, waiting for the warm-up to finish; None if there is none"""
+        if self.warm_thread is None:
+            return None
+        self.warm_thread.join()
+        camera, self.warm_camera = self.warm_camera, None
+        return camera
+
     def open_camera_window(self):
-        self.cam_window = CameraWindow()
+        if self.session is not None:
+            self.session.show_camera()
+            return
+        camera = self.take_warm_camera()
+        self.cam_window = CameraWindow(self.source, camera=camera, owns_camera=True)
         self.cam_window.show()
 
     def open_upload_window(self):
+        if self.session is not None:
+            self.session.show_upload()
+            return
         self.upload_window = UploadWindow()
         self.upload_window.show()
 
+    def open_gallery_window(self):
+        from photobooth.archive import default_archive
+
+        archive = default_archive()
+        if archive is None:
+            print("the session archive is turned off (PHOTOBOOTH_ARCHIVE=0)", file=sys.stderr)
+            return
+        self.gallery_window = GalleryWindow(archive)
+        self.gallery_window.show()
+
+    def closeEvent(self, event):
+        camera = self.take_warm_camera()
+        if camera is not None:
+            camera.stop()
+        event.accept()
+
+# ---------------------- KioskWindow ----------------------
+
+FIRST_FRAME_TARGET_MS = 250
+
+
+class KioskWindow(QStackedWidget):
+    """Runs sessions back to back in one window.
+
+    The camera is opened once and every screen is built once; moving to the
+    next step only resets a screen's state. Each session's time from tapping
+    "Use Camera" to the first preview frame is recorded in first_frame_times,
+    and from "Save" to the written strip in save_times.
+
+    pool and writer are where the booth's render work and strips go when
+    several booths share a process; by default they are Qt's pool and the
+    shared writer.
+    """
+
+    def __init__(self, source=0, settings=None, target_ms=FIRST_FRAME_TARGET_MS,
+                 name=None, pool=None, writer=None):
+        super().__init__()
+        self.name = name
+        self.pool = pool
+        self.writer = writer
+        self.setWindowTitle(f"Vintage Photobooth - {name}" if name else "Vintage Photobooth")
+        self.setFixedSize(420, 420)
+        self.target_ms = target_ms
+        self.first_frame_times = deque(maxlen=100)
+        self.save_times = deque(maxlen=100)
+        self.sessions = 0
+        # Releases the camera screen's frame buffer: for the session on screen,
+        # and for each strip still being written from one
+        self.release_frames = None
+        self.pending_releases = {}
+        from photobooth.camera import CameraCapture
+        self.camera = CameraCapture(source).start()
+
+        self.home = VintagePhotobooth(session=self)
+        self.camera_screen = CameraWindow(camera=self.camera, session=self)
+        self.upload_screen = UploadWindow(settings, session=self)
+        self.filter_screen = FilterWindow([], session=self)
+        self.final_screen = FinalDisplayWindow([], "sepia", "#723A03", "#FFFDD0", settings, session=self)
+        for screen in (self.home, self.camera_screen, self.upload_screen,
+                       self.filter_screen, self.final_screen):
+            self.addWidget(screen)
+        self.setCurrentWidget(self.home)
+
+    def show_camera(self):
+        self.drop_frames()
+        self.camera_screen.reset()
+        self.setCurrentWidget(self.camera_screen)
+
+    def show_upload(self):
+        self.drop_frames()
+        self.upload_screen.reset()
+        self.setCurrentWidget(self.upload_screen)
+
+    def show_filters(self, images, selected_filter="sepia", release=None):
+        self.release_frames = release
+        self.filter_screen.reset(images, selected_filter)
+        self.setCurrentWidget(self.filter_screen)
+
+    def drop_frames(self):
+        """Give back the shots of a session that ended without a strip"""
+        if self.release_frames is not None:
+            self.filter_screen.images = []
+            self.final_screen.release()
+            self.release_frames()
+            self.release_frames = None
+
+    def show_final(self, images, selected_filter, strip_color, bg_color):
+        self.final_screen.reset(images, selected_filter, strip_color, bg_color)
+        self.setCurrentWidget(self.final_screen)
+
+    def finish(self, path=None):
+        """The strip is queued for saving as path; hand the booth to the next guest"""
+        self.sessions += 1
+        self.filter_screen.images = []
+        self.final_screen.release()
+        release, self.release_frames = self.release_frames, None
+        if release is not None:
+            if path is None:
+                release()
+            else:
+                # The writer still reads the shots; the buffer is free once the strip is written
+                self.pending_releases[path] = release
+        self.setCurrentWidget(self.home)
+
+    def first_frame(self, ms):
+        self.first_frame_times.append(ms)
+        if ms > self.target_ms:
+            prefix = f"{self.name}: " if self.name else ""
+            print(f"{prefix}first preview frame took {ms:.0f} ms (target {self.target_ms} ms)", file=sys.stderr)
+
+    def strip_saved(self, ms):
+        self.save_times.append(ms)
+
+    def strip_written(self, path):
+        release = self.pending_releases.pop(path, None)
+        if release is not None:
+            release()
+
+    def metrics(self):
+        """Latency percentiles in ms, and the camera's frame rate, for this booth"""
+        first = sorted(self.first_frame_times)
+        saves = sorted(self.save_times)
+        metrics = {
+            "sessions": self.sessions,
+            "first_frame_p50_ms": percentile(first, 0.50),
+            "first_frame_p95_ms": percentile(first, 0.95),
+            "save_p50_ms": percentile(saves, 0.50),
+            "save_p95_ms": percentile(saves, 0.95),
+            "camera_fps": self.camera.fps,
+            "dropped": self.camera.dropped,
+        }
+        if hasattr(self.pool, "stats"):
+            metrics["pool"] = self.pool.stats()
+        if self.writer is not None:
+            metrics["writer"] = self.writer.stats()
+        return metrics
+
+    def closeEvent(self, event):
+        # Nothing still running for this booth may report back, or start more work, once it is closed
+        self.camera_screen.close()
+        self.filter_screen.cancel_thumbnails()
+        self.final_screen.release()
+        self.camera.stop()
+        event.accept()
+
+# ---------------------- MultiBooth ----------------------
+
+class MultiBooth:
+    """Several kiosks driven from one process, one per camera.
+
+    Every booth has its own capture thread, screens, session state and
+    strip writer. Filtering, composing and encoding from all of them run
+    on one FairPool, where each booth has a lane and the workers take
+    turns, so a booth printing a large strip can't starve the others.
+    fair=False puts every booth on a single lane, first come first served.
+    """
+
+    def __init__(self, sources, settings=None, workers=None, fair=True):
+        from photobooth.writer import EncoderSettings, StripWriter, downloads_dir
+
+        self.pool = FairPool(workers)
+        self.booths = []
+        for i, source in enumerate(sources, 1):
+            name = f"booth{i}"
+            lane = self.pool.lane(name if fair else "booths")
+            writer = StripWriter(downloads_dir(), EncoderSettings.from_env(),
+                                 prefix=f"photostrip-{name}", pool=lane)
+            self.booths.append(KioskWindow(source, settings, name=name, pool=lane, writer=writer))
+
+    def show(self):
+        """Show each booth on its own screen while there are screens to go round"""
+        screens = QApplication.screens()
+        for i, booth in enumerate(self.booths):
+            area = screens[i % len(screens)].availableGeometry()
+            offset = (i // len(screens)) * 40
+            booth.move(area.x() + offset, area.y() + offset)
+            booth.show()
+
+    def metrics(self):
+        return {booth.name: booth.metrics() for booth in self.booths}
+
+    def close(self, timeout=None):
+        """Close every booth, finish their strips and stop the pool"""
+        for booth in self.booths:
+            booth.close()
+        for booth in self.booths:
+            booth.writer.wait(timeout)
+            booth.writer.close()
+        self.pool.close()
+
+
+def camera_source(text):
+    """A device index, or a video file played back as a camera"""
+    if text.isdigit():
+        return int(text)
+    from photobooth.playback import PlaybackCapture
+    return partial(PlaybackCapture, text)
+
+
 if __name__ == "__main__":
+    # --trace logs stage timings; --trace=PATH also writes a Chrome trace on exit
+    for arg in sys.argv[1:]:
+        if arg == "--trace" or arg.startswith("--trace="):
+            TRACER.enable(arg.partition("=")[2] or None)
+    if TRACER.enabled:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    # --playback=VIDEO plays a video file back in place of the webcam;
+    # --booths=0,1,VIDEO runs a kiosk per camera in this one process
+    source = 0
+    booths = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--playback="):
+            source = camera_source(arg.partition("=")[2])
+        elif arg.startswith("--booths="):
+            booths = [camera_source(text) for text in arg.partition("=")[2].split(",")]
     app = QApplication(sys.argv)
-    window = VintagePhotobooth()
+    if booths:
+        window = MultiBooth(booths)
+    elif "--kiosk" in sys.argv[1:]:
+        window = KioskWindow(source)
+    else:
+        window = VintagePhotobooth(source=source)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    status = app.exec()
+    if booths:
+        window.close()
+        for name, metrics in window.metrics().items():
+            if metrics["sessions"]:
+                print(f"{name}: {metrics['sessions']} sessions, first frame p50 "
+                      f"{metrics['first_frame_p50_ms']:.0f} ms, save p50 {metrics['save_p50_ms']:.0f} ms "
+                      f"p95 {metrics['save_p95_ms']:.0f} ms", file=sys.stderr)
+    # Strips still being written are finished and handed to the archive and
+    # spooler first; only then is the spooler drained and stopped
+    from photobooth.spooler import close_default_spooler
+    from photobooth.writer import close_default_writer
+    close_default_writer()
+    close_default_spooler()
+    sys.exit(status)
\ No newline at end of file
@@ -0,0 +1 @@
+"""Rendering and capture helpers shared by the Vintage Photobooth windows."""
@@ -0,0 +1,212 @@
+"""Append-only archive of every session in one SQLite file.
+
+Each session keeps its source frames, the filter and colors it was
+rendered with, the saved strip file's bytes and a small strip thumbnail.
+Thumbnails live in the sessions table itself, while frames and strips sit
+in their own tables, so paging through the gallery only reads the small
+session rows. Rows are only ever inserted; re-rendering an archived session
+adds a new session that points back at the original frames instead of
+storing them again.
+
+The archive is ~/Downloads/photobooth-archive.sqlite unless
+PHOTOBOOTH_ARCHIVE names another file; PHOTOBOOTH_ARCHIVE=0 turns it off.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+from photobooth.export import encode_image
+
+log = logging.getLogger(__name__)
+
+# Thumbnails are half the 220x330 strip
+THUMB_SIZE = (110, 165)
+THUMB_QUALITY = 85
+FRAME_QUALITY = 95
+PAGE_SIZE = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    filter TEXT NOT NULL,
+    strip_color TEXT NOT NULL,
+    bg_color TEXT NOT NULL,
+    strip_path TEXT,
+    frames_from INTEGER REFERENCES sessions(id),
+    thumb BLOB
+);
+CREATE TABLE IF NOT EXISTS frames (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    idx INTEGER NOT NULL,
+    image BLOB NOT NULL,
+    PRIMARY KEY (session_id, idx)
+);
+CREATE TABLE IF NOT EXISTS strips (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions(id),
+    image BLOB NOT NULL
+);
+"""
+
+
+class ArchivedSession:
+    def __init__(self, id, created, filter_name, strip_color, bg_color, strip_path, frames_from):
+        self.id = id
+        self.created = created
+        self.filter_name = filter_name
+        self.strip_color = strip_color
+        self.bg_color = bg_color
+        self.strip_path = strip_path
+        self.frames_from = frames_from
+
+    @property
+    def frames_id(self):
+        """The session whose frames this one was rendered from"""
+        return self.frames_from if self.frames_from is not None else self.id
+
+
+def thumbnail(data, size=THUMB_SIZE):
+    """Decode encoded image bytes straight at thumbnail size"""
+    data = QByteArray(data)
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    stored = reader.size()
+    if stored.isValid():
+        reader.setScaledSize(stored.scaled(QSize(*size), Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read()
+
+
+class SessionArchive:
+    """One SQLite connection shared by the GUI and writer threads under a lock"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def add(self, frames, filter_name, strip_color, bg_color, strip_path=None,
+            strip_data=None, frames_from=None):
+        """Store one session and return its id.
+
+        frames are QImages, encoded here; they are skipped when frames_from
+        names an archived session they came from. strip_data is the saved
+        strip file's bytes, stored as they are.
+        """
+        encoded = [] if frames_from is not None else [
+            encode_image(frame, "JPEG", FRAME_QUALITY) for frame in frames]
+        thumb = None
+        if strip_data:
+            image = thumbnail(strip_data)
+            if not image.isNull():
+                thumb = encode_image(image, "JPEG", THUMB_QUALITY)
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO sessions (created, filter, strip_color, bg_color, strip_path,"
+                " frames_from, thumb) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), filter_name, strip_color, bg_color, strip_path, frames_from, thumb))
+            session_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO frames (session_id, idx, image) VALUES (?, ?, ?)",
+                [(session_id, idx, data) for idx, data in enumerate(encoded)])
+            if strip_data:
+                self._db.execute("INSERT INTO strips (session_id, image) VALUES (?, ?)",
+                                 (session_id, strip_data))
+        return session_id
+
+    def after_write(self, frames, filter_name, strip_color, bg_color, frames_from=None, then=None):
+        """An on_done(path, error) for StripWriter that archives the written strip.
+
+        It runs on the writer thread, reads the strip back from disk and
+        then calls then(path, error). Archive failures are logged, never
+        raised, so they can't lose the strip itself.
+        """
+        frames = list(frames)
+
+        def on_done(path, error):
+            if error is None:
+                try:
+                    with open(path, "rb") as fh:
+                        data = fh.read()
+                    self.add(frames, filter_name, strip_color, bg_color, path, data, frames_from)
+                except (OSError, sqlite3.Error) as exc:
+                    log.warning("could not archive %s: %s", path, exc)
+            frames.clear()
+            if then is not None:
+                then(path, error)
+
+        return on_done
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def page(self, before=None, limit=PAGE_SIZE):
+        """Newest sessions first, as (id, created, filter, thumbnail QImage).
+
+        Pass the last id of a page as before to get the next one; only the
+        session rows are read.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created, filter, thumb FROM sessions WHERE id < ?"
+                " ORDER BY id DESC LIMIT ?",
+                (before if before is not None else 1 << 62, limit)).fetchall()
+        return [(id, created, name, QImage.fromData(thumb) if thumb else QImage())
+                for id, created, name, thumb in rows]
+
+    def session(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, created, filter, strip_color, bg_color, strip_path, frames_from"
+                " FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise KeyError(session_id)
+        return ArchivedSession(*row)
+
+    def frames(self, session_id):
+        """The session's source frames as QImages, following frames_from"""
+        frames_id = self.session(session_id).frames_id
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT image FROM frames WHERE session_id = ? ORDER BY idx",
+                (frames_id,)).fetchall()
+        return [QImage.fromData(data) for (data,) in rows]
+
+    def strip(self, session_id):
+        """The saved strip file's bytes, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT image FROM strips WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_archive = None
+
+
+def default_archive():
+    """The shared archive named by PHOTOBOOTH_ARCHIVE, created on first use; None if turned off"""
+    global _default_archive
+    path = os.environ.get("PHOTOBOOTH_ARCHIVE", "")
+    if path == "0":
+        return None
+    if _default_archive is None:
+        if not path:
+            downloads = os.path.join(os.path.expanduser("~"), "Downloads")
+            os.makedirs(downloads, exist_ok=True)
+            path = os.path.join(downloads, "photobooth-archive.sqlite")
+        _default_archive = SessionArchive(path)
+    return _default_archive
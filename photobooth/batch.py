@@ -0,0 +1,153 @@
+"""Render photostrips from image files without opening any windows.
+
+Usage:
+
+    python -m photobooth a.jpg b.jpg c.jpg d.jpg e.jpg f.jpg --filter warm
+    python -m photobooth sessions/*/ --output-dir strips
+    python -m photobooth --manifest sessions.json
+
+Plain files are grouped in threes, in the order given. A directory counts as
+one session made of its first three images in name order. A manifest is a
+JSON list of objects with "images" and optional "filter", "strip_color",
+"bg_color" and "output" keys that override the command-line defaults.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PyQt6.QtGui import QImage
+
+from photobooth.cache import FilterCache
+from photobooth.export import FORMATS, export_strip
+from photobooth.filters import FILTERS
+from photobooth.pipeline import RenderSettings, parse_print_size, render_strip
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+DEFAULT_STRIP_COLOR = "#723A03"
+DEFAULT_BG_COLOR = "#FFFDD0"
+
+
+class BatchError(Exception):
+    pass
+
+
+def directory_images(path):
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return [os.path.join(path, n) for n in names[:3]]
+
+
+def collect_jobs(args):
+    defaults = {
+        "filter": args.filter,
+        "strip_color": args.strip_color,
+        "bg_color": args.bg_color,
+    }
+    sessions = []
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as fh:
+            for entry in json.load(fh):
+                sessions.append(dict(defaults, **entry))
+
+    loose = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            name = os.path.basename(os.path.normpath(path))
+            sessions.append(dict(defaults, images=directory_images(path), name=name))
+        else:
+            loose.append(path)
+    if len(loose) % 3:
+        raise BatchError(f"{len(loose)} loose images given; they are used in groups of three")
+    for i in range(0, len(loose), 3):
+        sessions.append(dict(defaults, images=loose[i:i + 3]))
+
+    jobs = []
+    for index, session in enumerate(sessions, 1):
+        if len(session["images"]) != 3:
+            raise BatchError(f"session {index} needs exactly three images: {session['images']}")
+        if session["filter"] not in FILTERS:
+            raise BatchError(f"session {index} has unknown filter {session['filter']!r}")
+        name = session.get("name") or f"strip-{index:04d}"
+        session.setdefault("output", os.path.join(args.output_dir, f"{name}.{args.format}"))
+        session["dpi"] = args.dpi
+        session["print_size"] = args.print_size
+        jobs.append(session)
+    return jobs
+
+
+def render_job(job):
+    """Render one strip in a worker process and return its output path"""
+    images = []
+    for path in job["images"]:
+        image = QImage(path)
+        if image.isNull():
+            raise BatchError(f"could not read {path}")
+        images.append(image)
+    settings = RenderSettings(export_dpi=job["dpi"], print_size=job["print_size"])
+    if settings.banded and os.path.splitext(job["output"])[1].lower() in FORMATS:
+        # Large strips go out in bands instead of one canvas per worker
+        export_strip(images, job["filter"], job["strip_color"], job["bg_color"], job["output"], settings)
+        return job["output"]
+    # Every image is seen once, so skip caching
+    strip_image = render_strip(images, job["filter"], job["strip_color"], job["bg_color"],
+                               settings.strip_size(), cache=FilterCache(max_bytes=0))
+    if not strip_image.save(job["output"]):
+        raise BatchError(f"could not write {job['output']}")
+    return job["output"]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m photobooth",
+        description="Render photostrips from image files.")
+    parser.add_argument("inputs", nargs="*", help="image files (in threes) or session directories")
+    parser.add_argument("--manifest", help="JSON list of sessions")
+    parser.add_argument("--filter", default="sepia",
+                        help=f"{', '.join(FILTERS)}, optionally followed by effects such as "
+                             f"+{'+'.join(FILTERS.effects())}")
+    parser.add_argument("--strip-color", default=DEFAULT_STRIP_COLOR)
+    parser.add_argument("--bg-color", default=DEFAULT_BG_COLOR)
+    parser.add_argument("--output-dir", default="strips")
+    parser.add_argument("--format", default="png", choices=("png", "jpg", "bmp"))
+    parser.add_argument("--dpi", type=int, default=96, help="export resolution (96 = 220x330 strip)")
+    parser.add_argument("--print-size", type=parse_print_size,
+                        help="print size in inches, e.g. 2x6 or 4x6 (default: the 220x330 layout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.manifest:
+        parser.error("no input images or manifest given")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        jobs = collect_jobs(args)
+    except (BatchError, OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+
+    failed = 0
+    start = time.perf_counter()
+    # Spawn rather than fork so workers never inherit Qt state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        futures = {pool.submit(render_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                print(future.result())
+            except Exception as exc:
+                failed += 1
+                print(f"error: {futures[future]['images']}: {exc}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    done = len(jobs) - failed
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"{done} strips in {elapsed:.2f}s ({rate:.1f} strips/sec, {args.workers} workers)")
+    return 1 if failed else 0
@@ -0,0 +1,149 @@
+"""Burst capture: record frames around the shutter and keep the best one.
+
+While armed, the capture thread copies every frame into a small
+preallocated ring. After the shutter it records a few more and then stops,
+so the burst holds frames from just before and just after the moment.
+Frames are scored on a downscaled grayscale copy: variance of the
+Laplacian for sharpness (motion blur and missed focus flatten it) plus how
+well exposed the frame is.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+SCORE_WIDTH = 320
+SHARPNESS_WEIGHT = 0.7
+EXPOSURE_WEIGHT = 0.3
+# Gray levels treated as crushed shadows or blown highlights
+CLIP_LOW = 8
+CLIP_HIGH = 247
+
+
+class BurstSettings:
+    def __init__(self, frames=5, before=2):
+        if frames < 1 or not 0 <= before < frames:
+            raise ValueError(f"invalid burst of {frames} frames with {before} before the shutter")
+        self.frames = frames
+        self.before = before
+
+    @classmethod
+    def from_env(cls):
+        """Read PHOTOBOOTH_BURST_FRAMES; 1 turns burst capture off"""
+        frames = int(os.environ.get("PHOTOBOOTH_BURST_FRAMES", 5))
+        return cls(frames, min(frames // 2, frames - 1))
+
+    @property
+    def after(self):
+        """Frames recorded from the shutter on, including the shutter frame"""
+        return self.frames - self.before
+
+
+class BurstRecorder:
+    """Ring of frames filled by the capture thread while armed.
+
+    push() is only called from the capture thread. The GUI calls
+    shutter(), and frames() is safe once wait() has returned True or
+    finish() has returned; a frame is copied in under the lock finish()
+    takes, so a stopped burst never holds a half-written slot.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.slots = None
+        self.pushed = 0
+        self._stop_at = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        # Idle until armed
+        self._done.set()
+
+    def arm(self):
+        """Start a new burst, reusing the slots of the last one"""
+        with self._lock:
+            self.pushed = 0
+            self._stop_at = None
+            self._done.clear()
+
+    def shutter(self):
+        self._stop_at = self.pushed + self.settings.after
+
+    def push(self, frame):
+        if self._done.is_set():
+            return
+        with self._lock:
+            if self._done.is_set():
+                return
+            if self.slots is None or self.slots.shape[1:] != frame.shape:
+                self.slots = np.empty((self.settings.frames,) + frame.shape, dtype=frame.dtype)
+                self.pushed = 0
+                if self._stop_at is not None:
+                    self._stop_at = self.settings.after
+            np.copyto(self.slots[self.pushed % self.settings.frames], frame)
+            self.pushed += 1
+            if self._stop_at is not None and self.pushed >= self._stop_at:
+                self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def finish(self):
+        """Stop recording early, e.g. when the camera stalls; waits out a frame being copied in"""
+        with self._lock:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def frames(self):
+        """The recorded frames, oldest first"""
+        count = min(self.pushed, self.settings.frames)
+        start = self.pushed - count
+        return [self.slots[i % self.settings.frames] for i in range(start, self.pushed)]
+
+
+def frame_metrics(frame, width=SCORE_WIDTH):
+    """Return (sharpness, exposure) for a BGR frame.
+
+    Sharpness is the variance of the Laplacian; exposure is 1 for a mid-gray
+    mean with nothing clipped and falls towards 0 as the frame gets darker,
+    brighter or more clipped.
+    """
+    height = max(1, frame.shape[0] * width // frame.shape[1])
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+    mean = float(gray.mean()) / 255
+    clipped = float(np.count_nonzero((gray < CLIP_LOW) | (gray > CLIP_HIGH))) / gray.size
+    exposure = max(0.0, 1 - 2 * abs(mean - 0.5) - clipped)
+    return sharpness, exposure
+
+
+def pick_best(frames, width=SCORE_WIDTH):
+    """Return (index, scores) of the best frame in a burst.
+
+    Sharpness only means something relative to the same scene, so it is
+    normalized by the sharpest frame of the burst before being weighted.
+    """
+    metrics = [frame_metrics(frame, width) for frame in frames]
+    sharpest = max(sharpness for sharpness, _ in metrics) or 1.0
+    scores = [SHARPNESS_WEIGHT * sharpness / sharpest + EXPOSURE_WEIGHT * exposure
+              for sharpness, exposure in metrics]
+    return int(np.argmax(scores)), scores
+
+
+def best_frame(recorder, timeout=2.0):
+    """Wait for the burst to finish and return the best frame's index in recorder.frames().
+
+    Meant to run on a worker thread; returns None if no frames arrived.
+    """
+    if not recorder.wait(timeout):
+        recorder.finish()
+    frames = recorder.frames()
+    if not frames:
+        return None
+    index, _ = pick_best(frames)
+    return index
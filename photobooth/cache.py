@@ -0,0 +1,90 @@
+"""LRU cache of filtered images shared by the preview and the export."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PyQt6.QtGui import QImage, QPixmap
+
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+def image_key(image):
+    """Return a content key for a QPixmap, QImage or ndarray.
+
+    Qt's cacheKey changes whenever the pixel data is modified, so it is a
+    cheap stand-in for a content hash. Arrays are hashed.
+    """
+    if isinstance(image, (QPixmap, QImage)):
+        return ("qt", type(image).__name__, image.cacheKey())
+    array = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(array.data, digest_size=16)
+    return ("array", array.shape, array.dtype.str, digest.hexdigest())
+
+
+def image_nbytes(image):
+    if isinstance(image, QImage):
+        return image.sizeInBytes()
+    if isinstance(image, QPixmap):
+        return image.width() * image.height() * max(image.depth(), 8) // 8
+    return getattr(image, "nbytes", 0)
+
+
+class FilterCache:
+    def __init__(self, max_bytes=DEFAULT_BUDGET):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        nbytes = image_nbytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+
+    def get_or_compute(self, image, name, compute, *extra, key=None):
+        """Return compute(image) from cache, keyed by image content, filter name and extra.
+
+        key replaces image_key(image) when the image is a converted copy of
+        the object whose identity should be used, e.g. a QImage taken from a
+        QPixmap so it can be processed off the GUI thread.
+        """
+        key = (key or image_key(image), name) + extra
+        value = self.get(key)
+        if value is None:
+            value = compute(image)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+filter_cache = FilterCache()
@@ -0,0 +1,536 @@
+"""Camera capture on a dedicated thread.
+
+The capture thread keeps calling VideoCapture.read into a small ring of
+preallocated frames, so the GUI never waits on the driver and always gets
+the newest frame instead of a stale one queued in the driver buffer.
+
+The camera is asked for a small preview stream in the best format it
+offers, and switched to its largest still size only around the shutter.
+If preview frames arrive slower than the frame rate asked for, the
+preview steps down to a smaller size.
+
+    PHOTOBOOTH_CAMERA_PREVIEW=640x480    preview size, or "default" for the driver's
+    PHOTOBOOTH_CAMERA_STILL=max          still size, e.g. 1920x1080; "off" shoots the preview
+    PHOTOBOOTH_CAMERA_FPS=30
+    PHOTOBOOTH_CAMERA_FORMATS=MJPG,YUYV  in order of preference; "default" leaves it alone
+    PHOTOBOOTH_CAMERA_ADAPT=0            keep the preview size however slow it runs
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from photobooth.trace import count, percentile, span
+
+log = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (640, 480)
+# Drivers snap a request to the nearest size they support, so this gets the largest
+MAX_SIZE = (10000, 10000)
+FORMATS = ("MJPG", "YUYV")
+# Sizes the preview steps down through when frames arrive too slowly
+PREVIEW_LADDER = ((1280, 720), (960, 540), (640, 480), (640, 360), (424, 240), (320, 240), (160, 120))
+# A format is good enough if it reaches this share of the frame rate asked for
+FPS_TOLERANCE = 0.9
+# Frame time budget as a multiple of the frame interval asked for
+BUDGET_SLACK = 1.2
+BUDGET_WINDOW = 30
+# Frames ignored after a mode change, while the stream restarts
+SETTLE_FRAMES = 5
+# A step down must cut frame time by at least this much to be kept
+STEP_GAIN = 0.9
+
+
+class FrameRing:
+    """Preallocated frame slots with a single writer and a single reader.
+
+    The writer fills slot seq % size and then publishes seq. Publishing is a
+    single attribute store, so no lock is needed; a reader holding a view
+    checks intact(seq) afterwards to make sure the writer has not lapped it.
+    """
+
+    def __init__(self, shape, size=4, dtype=np.uint8):
+        self.size = size
+        self.slots = np.empty((size,) + tuple(shape), dtype=dtype)
+        self.shape = tuple(shape)
+        self._writing = -1
+        self._published = -1
+        self._taken = -1
+        self.dropped = 0
+
+    def begin_write(self):
+        """Return (seq, slot) for the next frame to write"""
+        seq = self._writing + 1
+        self._writing = seq
+        return seq, self.slots[seq % self.size]
+
+    def abort(self, seq):
+        """Give back seq after a failed read that left its slot untouched"""
+        if self._writing == seq:
+            self._writing = seq - 1
+
+    def publish(self, seq):
+        previous = self._published
+        if previous >= 0 and previous != self._taken:
+            # The reader never saw the previous frame
+            self.dropped += 1
+        self._published = seq
+
+    def latest(self):
+        """Return (seq, view) of the newest frame, or (-1, None) before the first one"""
+        seq = self._published
+        if seq < 0:
+            return -1, None
+        self._taken = seq
+        return seq, self.slots[seq % self.size]
+
+    def intact(self, seq):
+        """True if the slot read for seq has not been overwritten since"""
+        return self._writing < seq + self.size
+
+
+class SessionFrames:
+    """The shots of one session, stored as RGB in one preallocated (count, H, W, 3) buffer.
+
+    The store owns the buffer and copies each shot out of the camera ring,
+    so a capture never aliases a slot the capture thread will overwrite.
+    views() and images() hand out zero-copy, read-only views of the shots.
+    Whoever the shots are handed to takes the buffer with hold() and gives
+    it back by calling the release function it returns. reset() reuses the
+    buffer once it is released; while it is still held, the next session
+    gets a spare instead, so at most two buffers go round.
+    """
+
+    def __init__(self, count=3, size=None):
+        self.count = count
+        self.buffer = None
+        self.taken = 0
+        self.allocations = 0
+        # Buffers handed on and not released yet, and one released for reuse
+        self._held = []
+        self._spare = None
+        if size is not None:
+            self.allocate(size)
+
+    def __len__(self):
+        return self.taken
+
+    @property
+    def full(self):
+        return self.taken >= self.count
+
+    @property
+    def held(self):
+        return any(buffer is self.buffer for buffer in self._held)
+
+    def _take(self, shape):
+        spare, self._spare = self._spare, None
+        if spare is not None and spare.shape == shape:
+            return spare
+        self.allocations += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def allocate(self, size):
+        """Have the buffer ready for (width, height) shots, as soon as the still mode is known"""
+        shape = (self.count, size[1], size[0], 3)
+        if self.taken or (self.buffer is not None and self.buffer.shape == shape):
+            return
+        self.buffer = self._take(shape)
+
+    def hold(self):
+        """Mark the buffer as in use by whoever gets the shots; returns the function that releases it"""
+        buffer = self.buffer
+        self._held.append(buffer)
+
+        def release():
+            for i, held in enumerate(self._held):
+                if held is buffer:
+                    del self._held[i]
+                    if buffer is not self.buffer and not any(b is buffer for b in self._held):
+                        self._spare = buffer
+                    return
+
+        return release
+
+    def reset(self):
+        """Forget the shots; the buffer is reused unless it is still held"""
+        if self.held:
+            self.buffer = None
+        self.taken = 0
+
+    def capture(self, frame, intact=None):
+        """Copy a BGR camera frame into the next slot and return its index.
+
+        intact is checked after the copy; if it returns False the frame was
+        overwritten mid-copy and the shot is dropped (None is returned).
+        """
+        if self.full:
+            raise IndexError("session already has all its shots")
+        height, width = frame.shape[:2]
+        if self.buffer is None or (self.taken == 0 and self.buffer.shape[1:3] != (height, width)):
+            self.buffer = self._take((self.count, height, width, 3))
+        slot = self.buffer[self.taken]
+        if frame.shape[:2] != slot.shape[:2]:
+            # The camera changed resolution mid-session; keep the session's size
+            frame = cv2.resize(frame, (slot.shape[1], slot.shape[0]), interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=slot)
+        if intact is not None and not intact():
+            return None
+        self.taken += 1
+        return self.taken - 1
+
+    def view(self, index):
+        if not 0 <= index < self.taken:
+            raise IndexError(index)
+        view = self.buffer[index]
+        view.flags.writeable = False
+        return view
+
+    def views(self):
+        return [self.view(i) for i in range(self.taken)]
+
+    def images(self):
+        """Zero-copy RGB888 QImages of the shots; they keep the buffer alive"""
+        images = []
+        for view in self.views():
+            height, width = view.shape[:2]
+            images.append(QImage(view.data, width, height, view.strides[0], QImage.Format.Format_RGB888))
+        return images
+
+
+def parse_size(text):
+    """Parse "WxH"; "max" is the largest the camera offers, and "default" or "off" give None"""
+    text = text.strip().lower()
+    if text in ("", "0", "off", "default", "none"):
+        return None
+    if text == "max":
+        return MAX_SIZE
+    width, sep, height = text.partition("x")
+    if not sep:
+        raise ValueError(f"invalid size {text!r}, expected WxH")
+    return int(width), int(height)
+
+
+def fourcc_text(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\0")
+
+
+class CameraMode:
+    """A size, frame rate and pixel format, as read back from the driver"""
+
+    def __init__(self, width, height, fps=0.0, fourcc=""):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def area(self):
+        return self.width * self.height
+
+    def __eq__(self, other):
+        return isinstance(other, CameraMode) and (
+            (self.width, self.height, self.fps, self.fourcc) == (other.width, other.height, other.fps, other.fourcc))
+
+    def __repr__(self):
+        return f"{self.width}x{self.height} {self.fourcc or '?'} {self.fps:g}fps"
+
+
+def current_mode(capture):
+    return CameraMode(int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                      capture.get(cv2.CAP_PROP_FPS), fourcc_text(capture.get(cv2.CAP_PROP_FOURCC)))
+
+
+def negotiate(capture, size, fps=None, formats=FORMATS, min_fps=None):
+    """Ask for size at fps in each of formats in turn and return the mode the driver settled on.
+
+    Drivers snap requests to what they support, so everything is read
+    back. The first format reaching min_fps (most of fps by default) wins,
+    otherwise the fastest one; a format the driver refuses is skipped.
+    """
+    if min_fps is None:
+        min_fps = fps * FPS_TOLERANCE if fps else 0
+    fastest = None
+    for fourcc in formats or (None,):
+        if fourcc is not None:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+        if fps:
+            capture.set(cv2.CAP_PROP_FPS, fps)
+        mode = current_mode(capture)
+        if fourcc is not None and mode.fourcc and mode.fourcc != fourcc:
+            continue
+        # Backends that can't tell report 0 fps
+        if not mode.fps or mode.fps >= min_fps:
+            return mode
+        if fastest is None or mode.fps > fastest[0].fps:
+            fastest = (mode, fourcc)
+    if fastest is None:
+        return current_mode(capture)
+    mode, fourcc = fastest
+    if current_mode(capture) != mode:
+        return negotiate(capture, size, fps, (fourcc,) if fourcc else (), min_fps=0)
+    return mode
+
+
+class CameraConfig:
+    """What to ask the camera for.
+
+    preview is the streaming size and still the size switched to around
+    the shutter; MAX_SIZE takes the largest the camera offers. None leaves
+    the preview at the driver's default, or shoots stills from the preview
+    stream. formats are FOURCCs in order of preference: MJPG usually keeps
+    full frame rate at sizes where raw YUYV runs out of USB bandwidth.
+    """
+
+    def __init__(self, preview=PREVIEW_SIZE, still=MAX_SIZE, fps=30, formats=FORMATS, adapt=True):
+        self.preview = preview
+        self.still = still
+        self.fps = fps
+        self.formats = tuple(formats)
+        self.adapt = adapt
+
+    @classmethod
+    def from_env(cls):
+        """Read the PHOTOBOOTH_CAMERA_* variables"""
+        formats = os.environ.get("PHOTOBOOTH_CAMERA_FORMATS", ",".join(FORMATS))
+        return cls(
+            preview=parse_size(os.environ.get("PHOTOBOOTH_CAMERA_PREVIEW", "640x480")),
+            still=parse_size(os.environ.get("PHOTOBOOTH_CAMERA_STILL", "max")),
+            fps=int(os.environ.get("PHOTOBOOTH_CAMERA_FPS", 30)),
+            formats=() if formats.lower() == "default" else
+            tuple(f.strip().upper() for f in formats.split(",") if f.strip()),
+            adapt=os.environ.get("PHOTOBOOTH_CAMERA_ADAPT", "1") != "0",
+        )
+
+    @property
+    def budget_ms(self):
+        return 1000 / self.fps * BUDGET_SLACK if self.fps else None
+
+
+class FrameBudget:
+    """Median time between frames over a sliding window, checked against a budget"""
+
+    def __init__(self, budget_ms, window=BUDGET_WINDOW, settle=SETTLE_FRAMES):
+        self.budget_ms = budget_ms
+        self.settle = settle
+        self.times = deque(maxlen=window)
+        self._settling = settle
+
+    def reset(self):
+        self.times.clear()
+        self._settling = self.settle
+
+    def add(self, ms):
+        """Record one frame time; True once a full window has a median over budget"""
+        if self._settling:
+            self._settling -= 1
+            return False
+        self.times.append(ms)
+        return len(self.times) == self.times.maxlen and self.median() > self.budget_ms
+
+    def median(self):
+        return percentile(sorted(self.times), 0.5)
+
+
+class CameraCapture:
+    """Reads frames from a cv2.VideoCapture on a background thread.
+
+    source is a device index or file path for cv2.VideoCapture, or a factory
+    returning an already configured capture object. config is a
+    CameraConfig, read from the environment by default; capture objects
+    without set() and get() are used as they are.
+    """
+
+    def __init__(self, source=0, ring_size=4, config=None):
+        self.source = source
+        self.ring_size = ring_size
+        self.config = config or CameraConfig.from_env()
+        self.ring = None
+        self.capture = None
+        self.fps = 0.0
+        self.failed_reads = 0
+        # Modes read back from the driver; None until negotiated
+        self.mode = None
+        self.preview_mode = None
+        self.still_mode = None
+        self.step_downs = 0
+        self._want_still = False
+        self._still = False
+        self._budget = None
+        self._stepped_from = None
+        # A burst.BurstRecorder to copy every new frame into, if set
+        self.burst = None
+        self._stop = threading.Event()
+        self._opened = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def is_open(self):
+        return self.capture is not None and self.capture.isOpened()
+
+    def wait_opened(self, timeout=None):
+        return self._opened.wait(timeout)
+
+    @property
+    def dropped(self):
+        return self.ring.dropped if self.ring is not None else 0
+
+    def latest(self):
+        if self.ring is None:
+            return -1, None
+        return self.ring.latest()
+
+    def intact(self, seq):
+        return self.ring is not None and self.ring.intact(seq)
+
+    def use_still(self):
+        """Switch to the still size for the coming shutter; the preview keeps running"""
+        self._want_still = True
+
+    def use_preview(self):
+        self._want_still = False
+
+    def _open(self):
+        if callable(self.source):
+            return self.source()
+        return cv2.VideoCapture(self.source)
+
+    def _configure(self):
+        config = self.config
+        if config.preview is None or not hasattr(self.capture, "set") or not self.capture.isOpened():
+            return
+        self.preview_mode = self.mode = negotiate(self.capture, config.preview, config.fps, config.formats)
+        log.info("camera preview %r", self.mode)
+        if config.adapt and config.budget_ms and self.mode.area:
+            self._budget = FrameBudget(config.budget_ms)
+
+    def _switch(self, still):
+        """Apply a still/preview switch; runs on the capture thread between reads"""
+        self._still = still
+        if self.preview_mode is None or self.config.still is None:
+            return
+        config = self.config
+        if still:
+            with span("camera.still"):
+                # Any frame rate will do for a still
+                self.still_mode = self.mode = negotiate(self.capture, config.still, config.fps,
+                                                        config.formats, min_fps=0)
+        else:
+            with span("camera.preview"):
+                self.mode = self._negotiate_preview(self.preview_mode)
+        if self._budget is not None:
+            self._budget.reset()
+
+    def _negotiate_preview(self, mode):
+        formats = (mode.fourcc,) if mode.fourcc else self.config.formats
+        return negotiate(self.capture, mode.size, self.config.fps, formats, min_fps=0)
+
+    def _adapt(self, frame_ms):
+        """Step the preview down a size while frames take longer than the budget"""
+        budget = self._budget
+        if not budget.add(frame_ms):
+            return
+        frame_ms = budget.median()
+        current = self.mode
+        if self._stepped_from is not None and frame_ms > self._stepped_from[1] * STEP_GAIN:
+            # Smaller frames came no faster, so size is not the bottleneck
+            # (dim light stretches exposure at any size); go back and stay there
+            previous = self._stepped_from[0]
+            log.info("preview %r did not help at %.0f ms a frame; back to %r", current, frame_ms, previous)
+            self.preview_mode = self.mode = self._negotiate_preview(previous)
+            self._budget = None
+            return
+        for size in PREVIEW_LADDER:
+            if size[0] * size[1] >= current.area:
+                continue
+            mode = negotiate(self.capture, size, self.config.fps, self.config.formats)
+            if mode.area < current.area:
+                log.info("preview %r at %.0f ms a frame, over the %.0f ms budget; stepping down to %r",
+                         current, frame_ms, budget.budget_ms, mode)
+                self._stepped_from = (current, frame_ms)
+                self.preview_mode = self.mode = mode
+                self.step_downs += 1
+                count("camera.step_downs")
+                budget.reset()
+                return
+        # Nothing smaller to go to
+        self._budget = None
+
+    def _run(self):
+        with span("camera.open"):
+            self.capture = self._open()
+            self._configure()
+        self._opened.set()
+        try:
+            self._read_loop()
+        finally:
+            self.capture.release()
+
+    def _read_loop(self):
+        window_start = time.perf_counter()
+        window_frames = 0
+        last_frame = None
+        while not self._stop.is_set() and self.capture.isOpened():
+            if self._want_still != self._still:
+                self._switch(self._want_still)
+                last_frame = None
+            if self.ring is None:
+                ok, frame = self.capture.read()
+                if ok:
+                    self.ring = FrameRing(frame.shape, self.ring_size, frame.dtype)
+                    seq, slot = self.ring.begin_write()
+                    slot[...] = frame
+            else:
+                seq, slot = self.ring.begin_write()
+                ok, frame = self.capture.read(slot)
+                if ok and frame.ctypes.data != slot.ctypes.data:
+                    # Resolution changed; start a new ring at the new size
+                    self.ring = FrameRing(frame.shape, self.ring_size, frame.dtype)
+                    seq, slot = self.ring.begin_write()
+                    slot[...] = frame
+            if not ok:
+                if self.ring is not None:
+                    self.ring.abort(seq)
+                self.failed_reads += 1
+                count("camera.failed_reads")
+                self._stop.wait(0.01)
+                continue
+            self.ring.publish(seq)
+            count("camera.frames")
+            burst = self.burst
+            if burst is not None:
+                burst.push(slot)
+
+            window_frames += 1
+            now = time.perf_counter()
+            if self._budget is not None and not self._still and burst is None:
+                if last_frame is not None:
+                    self._adapt((now - last_frame) * 1000)
+            last_frame = now
+            if now - window_start >= 1.0:
+                self.fps = window_frames / (now - window_start)
+                window_start, window_frames = now, 0
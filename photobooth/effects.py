@@ -0,0 +1,106 @@
+"""Vintage effects as cached per-size masks.
+
+Every effect is either a per-pixel multiply (vignette) or a per-pixel add
+(grain, scratches, light leaks). A run of effects therefore folds into a
+single multiply-add, out = in * mul + add, whose two masks depend only on
+the effects and the output size. The masks are built once per size and
+kept in a small LRU, so the three photos of a strip, every later strip and
+every preview at that size reuse them. Grain is cut from a noise tile
+drawn from a fixed seed, so it looks the same at every size and every run.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+GRAIN_TILE = 256
+# Masks for this many (effects, size) combinations are kept
+MASK_CACHE_SIZE = 16
+
+
+def _normalized_grid(height, width):
+    """Pixel centers scaled to -1..1 along each axis"""
+    ny = (np.arange(height, dtype=np.float32) + 0.5) / (height / 2) - 1
+    nx = (np.arange(width, dtype=np.float32) + 0.5) / (width / 2) - 1
+    return ny[:, None], nx[None, :]
+
+
+def vignette(height, width, strength=0.5, radius=0.5):
+    """Multiplier falling from 1 at radius (0 center, 1 corner) to 1 - strength in the corners"""
+    ny, nx = _normalized_grid(height, width)
+    distance = np.sqrt((ny * ny + nx * nx) / 2)
+    t = np.clip((distance - radius) / max(1e-6, 1 - radius), 0, 1)
+    return 1 - strength * t * t * (3 - 2 * t)
+
+
+@lru_cache(maxsize=8)
+def grain_tile(seed, amount, size=GRAIN_TILE):
+    """A size x size tile of gaussian noise, amount levels std dev"""
+    rng = np.random.default_rng(seed)
+    tile = rng.standard_normal((size, size), dtype=np.float32)
+    tile *= amount
+    tile.flags.writeable = False
+    return tile
+
+
+def grain(height, width, amount=10.0, seed=0):
+    """Monochrome film grain tiled from grain_tile"""
+    tile = grain_tile(seed, amount)
+    reps = (-(-height // tile.shape[0]), -(-width // tile.shape[1]))
+    return np.tile(tile, reps)[:height, :width]
+
+
+def scratches(height, width, count=6, intensity=60.0, seed=0):
+    """Thin bright vertical scratches at seeded positions, sized to the image"""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((height, width), dtype=np.float32)
+    line_width = max(1, width // 400)
+    for _ in range(count):
+        x = int(rng.uniform(0.05, 0.95) * width)
+        top, bottom = sorted(rng.uniform(0, 1, 2) * height)
+        if bottom - top < height * 0.2:
+            top, bottom = 0, height
+        value = intensity * rng.uniform(0.3, 1.0)
+        mask[int(top):int(bottom), x:x + line_width] = value
+    return mask
+
+
+def light_leak(height, width, color=(255, 120, 40), strength=0.6, x=1.0, y=0.2, radius=0.6):
+    """Warm glow bleeding in from (x, y), given as fractions of the width and height"""
+    ny, nx = _normalized_grid(height, width)
+    cx, cy = 2 * x - 1, 2 * y - 1
+    falloff = np.exp(-((nx - cx) ** 2 + (ny - cy) ** 2) / (2 * radius * radius))
+    glow = (strength * falloff)[..., None]
+    return glow * np.asarray(color, dtype=np.float32)
+
+
+MULTIPLY = {"vignette": vignette}
+ADD = {"grain": grain, "scratches": scratches, "light_leak": light_leak}
+EFFECTS = {**MULTIPLY, **ADD}
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def masks(effects, height, width):
+    """Return (mul, add) for a tuple of (kind, params) effects at one size.
+
+    mul is H x W or None; add is H x W, H x W x 3 (per channel) or None.
+    Both are read-only and shared between callers.
+    """
+    mul = None
+    add = None
+    for kind, params in effects:
+        mask = EFFECTS[kind](height, width, **dict(params)).astype(np.float32, copy=False)
+        if kind in MULTIPLY:
+            # (x * m1 + a1) * m2 = x * (m1 * m2) + a1 * m2
+            mul = mask if mul is None else mul * mask
+            if add is not None:
+                add = add * (mask if add.ndim == 2 else mask[..., None])
+        else:
+            if add is not None and add.ndim != mask.ndim:
+                add = add[..., None] if add.ndim == 2 else add
+                mask = mask[..., None] if mask.ndim == 2 else mask
+            add = mask if add is None else add + mask
+    for mask in (mul, add):
+        if mask is not None:
+            mask.flags.writeable = False
+    return mul, add
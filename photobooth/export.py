@@ -0,0 +1,180 @@
+"""High-resolution strip export rendered in horizontal tiles.
+
+A 4x6 in. strip at 600 DPI is 2400x3600 pixels; holding that canvas plus
+three filtered full-size photos at once costs well over 100 MB. Here the
+strip is painted one band of rows at a time and each band goes straight
+to the encoder, so only one band and the photo of the frame being drawn
+are in memory at any moment.
+"""
+
+import os
+import struct
+import zlib
+
+import numpy as np
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from photobooth.cache import FilterCache
+from photobooth.filters import QIMAGE_RGB_INDEX, qimage_view
+from photobooth.pipeline import paint_frames, render_photo
+
+DEFAULT_BAND_ROWS = 256
+INCHES_PER_METER = 39.3701
+
+
+class PngStreamWriter:
+    """Writes an 8-bit RGB PNG row band by row band, compressing as it goes"""
+
+    def __init__(self, fh, width, height, dpi=None, level=6):
+        self.fh = fh
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        fh.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        if dpi:
+            ppm = int(round(dpi * INCHES_PER_METER))
+            self._chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def _chunk(self, kind, data):
+        self.fh.write(struct.pack(">I", len(data)))
+        self.fh.write(kind)
+        self.fh.write(data)
+        self.fh.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+    def write_rows(self, rgb):
+        """Append an H x width x 3 uint8 band"""
+        rows = np.empty((rgb.shape[0], self.width * 3 + 1), dtype=np.uint8)
+        rows[:, 0] = 0  # filter type None
+        rows[:, 1:] = rgb.reshape(rgb.shape[0], -1)
+        data = self._compressor.compress(rows.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows_written += rgb.shape[0]
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"wrote {self.rows_written} of {self.height} rows")
+        self._chunk(b"IDAT", self._compressor.flush())
+        self._chunk(b"IEND", b"")
+
+
+class CanvasWriter:
+    """Collects bands into one preallocated canvas for encoders that cannot stream.
+
+    Qt's JPEG and WebP writers need the whole image, so the canvas is
+    unavoidable, but photos are still rendered and dropped one at a time.
+    """
+
+    def __init__(self, fh, width, height, dpi=None, fmt="JPEG", quality=-1):
+        self.fh = fh
+        self.fmt = fmt
+        self.quality = quality
+        self.dpi = dpi
+        self.canvas = np.empty((height, width, 3), dtype=np.uint8)
+        self.rows_written = 0
+
+    def write_rows(self, rgb):
+        self.canvas[self.rows_written:self.rows_written + rgb.shape[0]] = rgb
+        self.rows_written += rgb.shape[0]
+
+    def close(self):
+        height, width = self.canvas.shape[:2]
+        image = QImage(self.canvas.data, width, height, self.canvas.strides[0], QImage.Format.Format_RGB888)
+        if self.dpi:
+            ppm = int(round(self.dpi * INCHES_PER_METER))
+            image.setDotsPerMeterX(ppm)
+            image.setDotsPerMeterY(ppm)
+        data = encode_image(image, self.fmt, self.quality)
+        self.fh.write(data)
+
+
+def encode_image(image, fmt, quality=-1):
+    """Encode a QImage in memory; fmt is a Qt format name, PNG, JPEG or WEBP"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not image.save(buffer, fmt, quality):
+        raise OSError(f"could not encode {fmt}")
+    return bytes(data)
+
+
+FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".webp": "WEBP"}
+
+
+def image_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"unsupported export format {ext!r}")
+    return FORMATS[ext]
+
+
+def band_writer(fh, path, width, height, dpi=None, quality=-1, png_level=6):
+    fmt = image_format(path)
+    if fmt == "PNG":
+        return PngStreamWriter(fh, width, height, dpi, png_level)
+    return CanvasWriter(fh, width, height, dpi, fmt, quality)
+
+
+def write_image(fh, path, image, dpi=None, quality=-1, png_level=6):
+    """Encode a whole QImage to fh in the format named by path's extension"""
+    fmt = image_format(path)
+    if fmt == "PNG":
+        writer = PngStreamWriter(fh, image.width(), image.height(), dpi, png_level)
+        rgb = band_to_rgb(image.convertToFormat(QImage.Format.Format_RGB32))
+        for top in range(0, image.height(), DEFAULT_BAND_ROWS):
+            writer.write_rows(rgb[top:top + DEFAULT_BAND_ROWS])
+        writer.close()
+        return
+    if dpi:
+        image = QImage(image)
+        ppm = int(round(dpi * INCHES_PER_METER))
+        image.setDotsPerMeterX(ppm)
+        image.setDotsPerMeterY(ppm)
+    fh.write(encode_image(image, fmt, quality))
+
+
+def band_to_rgb(band):
+    """Copy the RGB channels out of a 32-bit QImage band"""
+    view = qimage_view(band)
+    return view[..., list(QIMAGE_RGB_INDEX)]
+
+
+def export_strip(sources, filter_name, strip_color, bg_color, path, settings,
+                 keys=None, band_rows=DEFAULT_BAND_ROWS, quality=-1, png_level=6, cache=None):
+    """Render the strip for settings in bands of band_rows and write it to path.
+
+    sources are full-resolution QImages; keys are their cache identities.
+    A photo is rendered when the first band touching its frame is painted
+    and dropped after the last one.
+    """
+    layout = settings.layout()
+    keys = keys or [None] * len(sources)
+    # Photos at print size are used once; keep them out of the shared cache
+    if cache is None:
+        cache = FilterCache(max_bytes=0)
+    photos = [None] * len(sources)
+
+    with open(path, "wb") as fh:
+        writer = band_writer(fh, path, layout.width, layout.height, settings.export_dpi, quality, png_level)
+        band = QImage(layout.width, band_rows, QImage.Format.Format_RGB32)
+        for top in range(0, layout.height, band_rows):
+            rows = min(band_rows, layout.height - top)
+            visible = [i for i, (_, y, _, h) in enumerate(layout.frames) if y < top + rows and y + h > top]
+            for i in range(len(photos)):
+                if i in visible and photos[i] is None:
+                    photos[i] = render_photo(sources[i], filter_name, layout.photo_size, settings,
+                                             key=keys[i], cache=cache)
+                elif i not in visible and photos[i] is not None and layout.frames[i][1] < top:
+                    photos[i] = None
+
+            band.fill(QColor(bg_color))
+            painter = QPainter(band)
+            painter.translate(0, -top)
+            paint_frames(painter, layout, photos, strip_color, visible)
+            painter.end()
+            writer.write_rows(band_to_rgb(band)[:rows])
+        writer.close()
+    return path
@@ -0,0 +1,83 @@
+"""Single-read, downscaled image loading for uploads.
+
+The file is read from disk once and decoded once, straight at the largest
+size anything downstream needs (QImageReader.setScaledSize lets the JPEG
+decoder skip most of the work). EXIF orientation is applied while
+decoding, and thumbnails are scaled from the decoded image instead of
+decoding the file a second time.
+"""
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PyQt6.QtGui import QImageIOHandler, QImageReader
+
+_SWAPS_AXES = (
+    QImageIOHandler.Transformation.TransformationRotate90,
+    QImageIOHandler.Transformation.TransformationRotate270,
+    QImageIOHandler.Transformation.TransformationMirrorAndRotate90,
+    QImageIOHandler.Transformation.TransformationFlipAndRotate90,
+)
+
+
+class LoadError(Exception):
+    pass
+
+
+class LoadedImage:
+    def __init__(self, path, image, thumbnail, source_size):
+        self.path = path
+        self.image = image
+        self.thumbnail = thumbnail
+        self.source_size = source_size
+
+
+def decode_size(width, height, boxes):
+    """Smallest size that still fills every (w, h) box; never larger than the source.
+
+    A None box means full resolution is needed.
+    """
+    scale = 0.0
+    for box in boxes:
+        if box is None:
+            return width, height
+        scale = max(scale, min(box[0] / width, box[1] / height))
+    scale = min(scale, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def load_image(path, boxes, thumbnail_box=None):
+    """Decode path once, fitted to the largest of boxes.
+
+    thumbnail_box, if given, is included in boxes and a thumbnail fitted to
+    it is scaled from the decoded image.
+    """
+    try:
+        with open(path, "rb") as fh:
+            data = QByteArray(fh.read())
+    except OSError as exc:
+        raise LoadError(f"could not read {path}: {exc}") from exc
+
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    stored = reader.size()
+    if not stored.isValid():
+        raise LoadError(f"{path} is not a supported image")
+
+    # Boxes are in display orientation; the reader scales before rotating
+    swap = reader.transformation() in _SWAPS_AXES
+    width, height = (stored.height(), stored.width()) if swap else (stored.width(), stored.height())
+    all_boxes = list(boxes) + ([thumbnail_box] if thumbnail_box else [])
+    out_w, out_h = decode_size(width, height, all_boxes)
+    if (out_w, out_h) != (width, height):
+        reader.setScaledSize(QSize(out_h, out_w) if swap else QSize(out_w, out_h))
+
+    image = reader.read()
+    if image.isNull():
+        raise LoadError(f"could not decode {path}: {reader.errorString()}")
+
+    thumbnail = None
+    if thumbnail_box:
+        thumbnail = image.scaled(thumbnail_box[0], thumbnail_box[1], Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+    return LoadedImage(path, image, thumbnail, QSize(width, height))
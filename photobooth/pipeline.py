@@ -0,0 +1,253 @@
+"""Resolution-aware render pipeline for strip frames.
+
+Frames are downsampled to the exact size they are shown or saved at before
+the filter runs, so the filter only touches pixels that end up on screen or
+on paper. Filter-then-scale is kept behind a setting for when the output
+has to match the original pipeline exactly.
+
+Everything here works on QImage so it can run on worker threads; QPixmap is
+only safe to use on the GUI thread.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from photobooth.cache import filter_cache, image_key
+from photobooth.filters import FILTERS, array_to_qimage, filter_qimage, qimage_to_array
+from photobooth.trace import span
+
+# Layout of the saved strip at BASE_DPI, in pixels
+BASE_DPI = 96
+STRIP_SIZE = (220, 330)
+FRAME_SIZE = (200, 100)
+PHOTO_SIZE = (190, 90)
+PREVIEW_SIZE = PHOTO_SIZE
+FRAME_X, FRAME_RADIUS = 10, 20
+PHOTO_OFFSET = 5
+PHOTO_COUNT = 3
+
+# Frame layers kept, one per strip size and color pair
+FRAME_LAYERS = 8
+
+# Print sizes in inches, (width, height)
+PRINT_SIZES = {"2x6": (2, 6), "4x6": (4, 6)}
+
+# Uploads are kept sharp enough for the gallery to reprint them this large
+REPRINT_DPI = 600
+REPRINT_SIZE = PRINT_SIZES["4x6"]
+
+
+class StripLayout:
+    """Pixel geometry of a strip: one (x, y, w, h) frame and photo box per photo"""
+
+    def __init__(self, width, height):
+        if width <= 0 or height <= 0:
+            raise ValueError(f"invalid strip size {width}x{height}")
+        # The 220x330 layout scaled to the strip width
+        scale = width / STRIP_SIZE[0]
+        px = lambda v: int(round(v * scale))
+        frame_w, frame_h = px(FRAME_SIZE[0]), px(FRAME_SIZE[1])
+        # Equal gap above every frame: 10px at 220x330, wider on taller strips
+        gap = (height - PHOTO_COUNT * frame_h) / PHOTO_COUNT
+        if gap < 0:
+            raise ValueError(f"strip size {width}x{height} is too short for {PHOTO_COUNT} frames")
+        self.width = width
+        self.height = height
+        self.radius = px(FRAME_RADIUS)
+        self.photo_size = (px(PHOTO_SIZE[0]), px(PHOTO_SIZE[1]))
+        self.frames = []
+        self.photos = []
+        for i in range(PHOTO_COUNT):
+            y = int(round(gap + i * (frame_h + gap)))
+            self.frames.append((px(FRAME_X), y, frame_w, frame_h))
+            self.photos.append((px(FRAME_X + PHOTO_OFFSET), y + px(PHOTO_OFFSET)) + self.photo_size)
+
+
+def parse_print_size(text):
+    """Turn "4x6" (or a PRINT_SIZES name) into (width, height) inches"""
+    if text in PRINT_SIZES:
+        return PRINT_SIZES[text]
+    width, sep, height = text.lower().partition("x")
+    if not sep:
+        raise ValueError(f"print size {text!r} is not WIDTHxHEIGHT in inches")
+    return float(width), float(height)
+
+
+class RenderSettings:
+    def __init__(self, export_dpi=BASE_DPI, scale_first=True, print_size=None):
+        self.export_dpi = export_dpi
+        self.scale_first = scale_first
+        self.print_size = print_size
+
+    @classmethod
+    def from_env(cls):
+        """Read PHOTOBOOTH_EXPORT_DPI, PHOTOBOOTH_FILTER_FIRST and PHOTOBOOTH_PRINT_SIZE"""
+        dpi = int(os.environ.get("PHOTOBOOTH_EXPORT_DPI", BASE_DPI))
+        filter_first = os.environ.get("PHOTOBOOTH_FILTER_FIRST", "") not in ("", "0")
+        print_size = os.environ.get("PHOTOBOOTH_PRINT_SIZE")
+        return cls(export_dpi=dpi, scale_first=not filter_first,
+                   print_size=parse_print_size(print_size) if print_size else None)
+
+    @property
+    def export_scale(self):
+        return self.export_dpi / BASE_DPI
+
+    @property
+    def banded(self):
+        """Whether strips are exported in bands: a print size or a DPI other than the screen layout's"""
+        return bool(self.print_size) or self.export_dpi != BASE_DPI
+
+    def export_size(self, size):
+        scale = self.export_scale
+        return (int(round(size[0] * scale)), int(round(size[1] * scale)))
+
+    def strip_size(self):
+        """Pixel size of the exported strip: the print size at export_dpi, if set"""
+        if self.print_size:
+            return (int(round(self.print_size[0] * self.export_dpi)),
+                    int(round(self.print_size[1] * self.export_dpi)))
+        return self.export_size(STRIP_SIZE)
+
+    def layout(self):
+        return StripLayout(*self.strip_size())
+
+    def decode_boxes(self):
+        """Sizes source photos are drawn at; None means full resolution is needed"""
+        if not self.scale_first:
+            return [None]
+        return [PREVIEW_SIZE, self.layout().photo_size]
+
+    def source_boxes(self):
+        """Sizes uploads are kept at: this strip's boxes plus a reprint at REPRINT_DPI.
+
+        The frames are saved and archived, and the gallery re-renders them
+        later, possibly at a higher DPI than this session's.
+        """
+        reprint = RenderSettings(export_dpi=max(self.export_dpi, REPRINT_DPI), print_size=REPRINT_SIZE)
+        return self.decode_boxes() + [reprint.layout().photo_size]
+
+
+def scale_image(image, size):
+    return image.scaled(size[0], size[1], Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def render_photo(image, filter_name, size, settings=None, key=None, cache=filter_cache):
+    """Return image filtered and fitted inside size, cached per target size.
+
+    key is the cache identity of the source (see FilterCache.get_or_compute).
+    """
+    settings = settings or RenderSettings()
+    size = tuple(size)
+    if filter_name not in FILTERS:
+        return scale_image(image, size)
+    if settings.scale_first:
+        return cache.get_or_compute(
+            image, filter_name,
+            lambda img: filter_qimage(scale_image(img, size), filter_name),
+            size, "scale-first", key=key)
+    # Scaled as RGB32 like the original pixmaps; ARGB32 smooth-scales to different pixels
+    filtered = cache.get_or_compute(
+        image, filter_name,
+        lambda img: filter_qimage(img, filter_name).convertToFormat(QImage.Format.Format_RGB32),
+        "full", key=key)
+    return cache.get_or_compute(
+        image, filter_name, lambda img: scale_image(filtered, size),
+        size, "filter-first", key=key)
+
+
+def paint_frames(painter, layout, photos, strip_color, indexes=None):
+    """Draw the rounded frames and their photos for the given frame indexes"""
+    painter.setBrush(QColor(strip_color))
+    painter.setPen(Qt.PenStyle.NoPen)
+    for i in range(len(layout.frames)) if indexes is None else indexes:
+        x, y, w, h = layout.frames[i]
+        painter.drawRoundedRect(x, y, w, h, layout.radius, layout.radius)
+        painter.drawImage(layout.photos[i][0], layout.photos[i][1], photos[i])
+
+
+class FrameLayers:
+    """Strip backgrounds with their empty frames, cached per size and colors.
+
+    A strip is its frame layer with the photos copied on top. The photos
+    come from render_photo's cache, so changing only the strip or
+    background color paints one new layer and repeats of earlier colors
+    paint nothing at all.
+    """
+
+    def __init__(self, max_layers=FRAME_LAYERS):
+        self.max_layers = max_layers
+        self.hits = 0
+        self.misses = 0
+        self._layers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, layout, strip_color, bg_color):
+        key = (layout.width, layout.height, QColor(strip_color).rgba(), QColor(bg_color).rgba())
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+                return layer
+            self.misses += 1
+        layer = QImage(layout.width, layout.height, QImage.Format.Format_RGB32)
+        layer.fill(QColor(bg_color))
+        painter = QPainter(layer)
+        painter.setBrush(QColor(strip_color))
+        painter.setPen(Qt.PenStyle.NoPen)
+        for x, y, w, h in layout.frames:
+            painter.drawRoundedRect(x, y, w, h, layout.radius, layout.radius)
+        painter.end()
+        with self._lock:
+            self._layers[key] = layer
+            while len(self._layers) > self.max_layers:
+                self._layers.popitem(last=False)
+        return layer
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+
+frame_layers = FrameLayers()
+
+
+def compose_strip(photos, strip_color, bg_color, settings=None, layout=None, layers=frame_layers):
+    """Copy already rendered photos onto the cached frame layer and return the QImage"""
+    layout = layout or (settings or RenderSettings()).layout()
+    with span("strip.paint"):
+        # Frames never overlap, so drawing all of them before the photos changes nothing
+        strip_image = layers.get(layout, strip_color, bg_color).copy()
+        painter = QPainter(strip_image)
+        for (x, y, _, _), photo in zip(layout.photos, photos):
+            painter.drawImage(x, y, photo)
+        painter.end()
+    return strip_image
+
+
+def render_strip(images, filter_name, strip_color, bg_color, size=STRIP_SIZE,
+                 scale_first=True, cache=filter_cache, layers=frame_layers):
+    """Render a complete strip without any widgets.
+
+    images are three QImages or H x W x 3 RGB arrays; the result has the
+    same kind. size is the strip's (width, height); the layout is scaled
+    to the width and taller strips spread the frames out.
+    """
+    layout = StripLayout(*size)
+    settings = RenderSettings(scale_first=scale_first)
+
+    arrays = not isinstance(images[0], QImage)
+    photo_size = layout.photo_size
+    photos = []
+    for img in images:
+        # Arrays are cached by content, not by their temporary QImage copy
+        key = image_key(img) if arrays else None
+        source = array_to_qimage(img) if arrays else img
+        photos.append(render_photo(source, filter_name, photo_size, settings, key=key, cache=cache))
+    strip_image = compose_strip(photos, strip_color, bg_color, layout=layout, layers=layers)
+    return qimage_to_array(strip_image) if arrays else strip_image
@@ -0,0 +1,128 @@
+"""A video file played back as a webcam, standing in for cv2.VideoCapture.
+
+PlaybackCapture behaves the way a V4L2 webcam does as far as the booth can
+tell. It offers a table of (format, width, height, max fps) modes, snaps
+every set() to the nearest mode it supports and answers get() with what it
+settled on. read() is paced at the negotiated frame rate and returns the
+video scaled to the negotiated size, looping at the end of the file. A
+mode change costs switch_ms on the next read, like a stream restart, and
+cost_ms_per_mp adds a per-frame delay proportional to the frame area, to
+stand in for decoding on a slow host.
+
+    CameraCapture(lambda: PlaybackCapture("clip.mp4"))
+"""
+
+import time
+
+import cv2
+
+from photobooth.camera import fourcc_text
+
+# A typical 1080p USB webcam: MJPG keeps 30 fps at every size, raw YUYV
+# runs out of USB bandwidth above 640x480
+WEBCAM_MODES = (
+    ("MJPG", 1920, 1080, 30), ("MJPG", 1280, 720, 30), ("MJPG", 640, 480, 30), ("MJPG", 320, 240, 30),
+    ("YUYV", 1920, 1080, 5), ("YUYV", 1280, 720, 10), ("YUYV", 640, 480, 30), ("YUYV", 320, 240, 30),
+)
+
+
+class PlaybackCapture:
+    def __init__(self, path, modes=WEBCAM_MODES, default=("YUYV", 640, 480), realtime=True,
+                 switch_ms=0.0, cost_ms_per_mp=0.0):
+        self.path = path
+        self.modes = [tuple(mode) for mode in modes]
+        self.realtime = realtime
+        self.switch_ms = switch_ms
+        self.cost_ms_per_mp = cost_ms_per_mp
+        self.fourcc, self.width, self.height = default
+        self.fps = self._max_fps()
+        self.switches = 0
+        self._video = cv2.VideoCapture(path)
+        self._source = None
+        self._restart = False
+        self._next_at = None
+
+    def isOpened(self):
+        return self._video.isOpened()
+
+    def _max_fps(self):
+        for fourcc, width, height, fps in self.modes:
+            if (fourcc, width, height) == (self.fourcc, self.width, self.height):
+                return fps
+        return 0
+
+    def _snap(self, fourcc, width, height):
+        """The mode of fourcc nearest to width x height, as drivers pick it"""
+        sizes = [(w, h) for f, w, h, _ in self.modes if f == fourcc]
+        return min(sizes, key=lambda size: abs(size[0] - width) + abs(size[1] - height))
+
+    def _set_mode(self, fourcc, width, height):
+        if (fourcc, width, height) != (self.fourcc, self.width, self.height):
+            self.fourcc, self.width, self.height = fourcc, width, height
+            self.fps = self._max_fps()
+            self._restart = True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            fourcc = fourcc_text(value)
+            if not any(mode[0] == fourcc for mode in self.modes):
+                return False
+            self._set_mode(fourcc, *self._snap(fourcc, self.width, self.height))
+        elif prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self._set_mode(self.fourcc, *self._snap(self.fourcc, value, self.height))
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self._set_mode(self.fourcc, *self._snap(self.fourcc, self.width, value))
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = max(1, min(int(value), self._max_fps()))
+        else:
+            return False
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return float(cv2.VideoWriter_fourcc(*self.fourcc))
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def _decode(self):
+        ok, frame = self._video.read(self._source)
+        if not ok:
+            # Loop back to the start of the file
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read(self._source)
+        if ok:
+            self._source = frame
+        return ok
+
+    def read(self, image=None):
+        if self._restart:
+            self._restart = False
+            self.switches += 1
+            time.sleep(self.switch_ms / 1000)
+            self._next_at = None
+        if self.realtime:
+            now = time.perf_counter()
+            if self._next_at is not None and self._next_at > now:
+                time.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at or now) + 1 / self.fps
+        if not self._decode():
+            return False, None
+        if self.cost_ms_per_mp:
+            time.sleep(self.cost_ms_per_mp * self.width * self.height / 1e6 / 1000)
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = None
+        if self._source.shape[:2] == (self.height, self.width):
+            if image is None:
+                return True, self._source.copy()
+            image[...] = self._source
+            return True, image
+        return True, cv2.resize(self._source, (self.width, self.height), dst=image,
+                                interpolation=cv2.INTER_AREA)
+
+    def release(self):
+        self._video.release()
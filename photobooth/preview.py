@@ -0,0 +1,104 @@
+"""Allocation-free camera preview.
+
+Frames are resized to the on-screen size into a reused buffer before Qt
+ever sees them, and wrapped by a QImage that is created once per frame
+size. With Format_BGR888 the OpenCV frame is shown as-is, so there is no
+color conversion either. A live filter, if selected, runs in place on the
+small buffer through a precompiled LUT or color matrix, or the fused
+filter kernel for chains that are more than that.
+"""
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QPoint
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QLabel
+
+from photobooth.filters import preview_kernel
+
+HAS_BGR888 = hasattr(QImage.Format, "Format_BGR888")
+
+
+def fit_size(width, height, box_width, box_height):
+    """Largest size with the frame's aspect ratio that fits inside the box"""
+    scale = min(box_width / width, box_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class PreviewRenderer:
+    def __init__(self, box_width, box_height, use_bgr888=HAS_BGR888):
+        self.box = (box_width, box_height)
+        self.use_bgr888 = use_bgr888
+        self.filter_name = None
+        self._kernel = None
+        self.frames = 0
+        self.allocations = 0
+        self._source_shape = None
+        self._resized = None
+        self._rgb = None
+        self._image = None
+
+    def set_filter(self, name):
+        """Show frames through filter name, or unfiltered for None"""
+        self.filter_name = name
+        self._kernel = preview_kernel(name, "bgr") if name else None
+
+    def _allocate(self, shape):
+        height, width = shape[:2]
+        out_w, out_h = fit_size(width, height, *self.box)
+        self._resized = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        if self.use_bgr888:
+            self._rgb = self._resized
+            fmt = QImage.Format.Format_BGR888
+        else:
+            self._rgb = np.empty_like(self._resized)
+            fmt = QImage.Format.Format_RGB888
+        self._image = QImage(self._rgb.data, out_w, out_h, self._rgb.strides[0], fmt)
+        self._source_shape = shape
+        self.allocations += 1
+
+    def render(self, frame):
+        """Return a QImage of the BGR frame fitted to the box.
+
+        The image shares memory with internal buffers and is overwritten by
+        the next call.
+        """
+        if frame.shape != self._source_shape:
+            self._allocate(frame.shape)
+        height, width = self._resized.shape[:2]
+        cv2.resize(frame, (width, height), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        if self._kernel is not None:
+            kind, table = self._kernel
+            if kind == "lut":
+                cv2.LUT(self._resized, table, dst=self._resized)
+            elif kind == "matrix":
+                cv2.transform(self._resized, table, dst=self._resized)
+            else:
+                table.apply_array(self._resized, "bgr")
+        if not self.use_bgr888:
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        self.frames += 1
+        return self._image
+
+
+class PreviewLabel(QLabel):
+    """QLabel that paints a QImage directly instead of going through QPixmap"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = None
+
+    def setImage(self, image):
+        self._image = image
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None:
+            return
+        rect = self.contentsRect()
+        top_left = QPoint(rect.x() + (rect.width() - self._image.width()) // 2,
+                          rect.y() + (rect.height() - self._image.height()) // 2)
+        painter = QPainter(self)
+        painter.drawImage(top_left, self._image)
+        painter.end()
@@ -0,0 +1,365 @@
+"""Filters declared as chains of ops and compiled into fused kernels.
+
+A filter is a list of ops, for example
+
+    [{"op": "curve", "points": [[0, 20], [255, 235]]},
+     {"op": "matrix", "rows": [[0.9, 0.1, 0], [0, 1, 0], [0, 0.1, 0.9]]},
+     {"op": "vignette", "strength": 0.4}]
+
+Compiling merges neighbouring per-channel ops (curve, gain, contrast) into
+one 256-entry LUT, neighbouring color matrices into one matrix and
+neighbouring effects (vignette, grain, scratches, light_leak) into one
+multiply-add with masks cached per size, see photobooth.effects. The
+stages that remain run on one block of rows at a time, each block going
+through the whole chain while it is in cache. Stacking effects therefore
+costs a single traversal of the image. Chains made only of per-channel ops
+collapse to a single table lookup.
+
+Filters can be added from JSON or TOML files holding a "filters" table that
+maps each name to its ops, or to {"label": ..., "ops": [...]}; adding
+"kind": "effect" offers the chain as an effect instead of a filter.
+"""
+
+import glob
+import inspect
+import json
+import os
+
+import numpy as np
+
+from photobooth.effects import EFFECTS, masks
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Pixels per block of rows for chains that need float temporaries
+MATRIX_BLOCK_PIXELS = 1 << 16
+
+
+class FilterError(ValueError):
+    pass
+
+
+class LutStage:
+    """Per-channel 256-entry lookup, a (3, 256) table for (r, g, b)"""
+
+    spatial = False
+
+    def __init__(self, table):
+        self.table = np.ascontiguousarray(table, dtype=np.uint8)
+
+    def then(self, other):
+        """Fold a following LUT into this one"""
+        return LutStage(np.stack([other.table[c][self.table[c]] for c in range(3)]))
+
+    def apply(self, planes, top, height, width):
+        for plane, lut in zip(planes, self.table):
+            np.take(lut, plane, out=plane)
+
+
+class MatrixStage:
+    """3x3 color matrix plus offset, computed in float64 and truncated.
+
+    Terms are summed left to right like "w0 * r + w1 * g + w2 * b", so the
+    built-in sepia and black and white filters match the original per-pixel
+    loops bit for bit.
+    """
+
+    spatial = False
+
+    def __init__(self, rows, offset=(0.0, 0.0, 0.0)):
+        self.rows = tuple(tuple(float(w) for w in row) for row in rows)
+        self.offset = tuple(float(o) for o in offset)
+
+    def then(self, other):
+        """Fold a following matrix into this one.
+
+        The fused matrix skips the clamp between the two steps, so it can
+        differ from running them one after the other by a level or so.
+        """
+        first = np.array(self.rows)
+        second = np.array(other.rows)
+        offset = second @ np.array(self.offset) + np.array(other.offset)
+        return MatrixStage((second @ first).tolist(), offset.tolist())
+
+    def _row(self, index, rf, gf, bf):
+        weights = self.rows[index]
+        out = rf * weights[0]
+        out += gf * weights[1]
+        out += bf * weights[2]
+        if self.offset[index]:
+            out += self.offset[index]
+        np.clip(out, 0.0, 255.0, out=out)
+        return out.astype(np.uint8)
+
+    def apply(self, planes, top, height, width):
+        rf, gf, bf = (plane.astype(np.float64) for plane in planes)
+        if self.rows[0] == self.rows[1] == self.rows[2] and len(set(self.offset)) == 1:
+            # Grayscale: one weighted sum serves all three channels
+            gray = self._row(0, rf, gf, bf)
+            for plane in planes:
+                plane[...] = gray
+            return
+        for index, plane in enumerate(planes):
+            plane[...] = self._row(index, rf, gf, bf)
+
+
+class EffectStage:
+    """A run of vintage effects applied as one multiply-add with cached masks"""
+
+    spatial = True
+
+    def __init__(self, effects):
+        self.effects = tuple(effects)
+
+    def then(self, other):
+        return EffectStage(self.effects + other.effects)
+
+    def apply(self, planes, top, height, width):
+        mul, add = masks(self.effects, height, width)
+        rows = slice(top, top + planes[0].shape[0])
+        for channel, plane in enumerate(planes):
+            out = plane.astype(np.float32)
+            if mul is not None:
+                out *= mul[rows]
+            if add is not None:
+                out += add[rows] if add.ndim == 2 else add[rows, :, channel]
+            np.clip(out, 0, 255, out=out)
+            plane[...] = out
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _effect_op(kind):
+    signature = inspect.signature(EFFECTS[kind])
+
+    def build(**params):
+        # Raises TypeError for unknown or missing parameters, like the other ops
+        signature.bind(1, 1, **params)
+        return EffectStage([(kind, tuple(sorted((k, _freeze(v)) for k, v in params.items())))])
+
+    return build
+
+
+def _channel_table(func):
+    values = np.arange(256, dtype=np.float64)
+    return np.stack([np.clip(func(values, c), 0, 255).astype(np.uint8) for c in range(3)])
+
+
+def _gain_op(gains):
+    if len(gains) != 3:
+        raise FilterError("gain needs three gains (r, g, b)")
+    # Same expression as the original per-pixel loops: min(255, int(v * gain))
+    return LutStage([[min(255, int(v * gain)) for v in range(256)] for gain in gains])
+
+
+def _curve_op(points=None, r=None, g=None, b=None):
+    curves = [r or points, g or points, b or points]
+    if any(curve is None for curve in curves):
+        raise FilterError("curve needs points, or r, g and b point lists")
+
+    def lookup(values, channel):
+        xs, ys = zip(*sorted(curves[channel]))
+        return np.rint(np.interp(values, xs, ys))
+
+    return LutStage(_channel_table(lookup))
+
+
+def _contrast_op(amount):
+    return LutStage(_channel_table(lambda values, _: np.rint((values - 128) * float(amount) + 128)))
+
+
+def _matrix_op(rows=None, weights=None, offset=(0, 0, 0)):
+    if weights is not None:
+        rows = [weights] * 3
+    if rows is None or len(rows) != 3 or any(len(row) != 3 for row in rows):
+        raise FilterError("matrix needs 3x3 rows or three weights")
+    if len(offset) != 3:
+        raise FilterError("matrix offset needs three values")
+    return MatrixStage(rows, offset)
+
+
+OPS = {
+    "matrix": _matrix_op,
+    "gain": _gain_op,
+    "curve": _curve_op,
+    "contrast": _contrast_op,
+    **{kind: _effect_op(kind) for kind in EFFECTS},
+}
+
+
+def compile_ops(ops):
+    """Turn a list of op dicts into fused stages"""
+    stages = []
+    for op in ops:
+        params = dict(op)
+        kind = params.pop("op", None)
+        if kind not in OPS:
+            raise FilterError(f"unknown op {kind!r}; expected one of {', '.join(OPS)}")
+        try:
+            stage = OPS[kind](**params)
+        except TypeError as exc:
+            raise FilterError(f"bad parameters for {kind}: {exc}") from None
+        if stages and type(stages[-1]) is type(stage) and hasattr(stage, "then"):
+            stages[-1] = stages[-1].then(stage)
+        else:
+            stages.append(stage)
+    return stages
+
+
+class CompiledFilter:
+    def __init__(self, name, ops, stages, label=None, kind="filter"):
+        self.name = name
+        self.ops = list(ops)
+        self.stages = stages
+        self.label = label or name.upper().replace("_", " ")
+        self.kind = kind
+
+    def lut(self):
+        """The (3, 256) table if the whole chain is one lookup, else None"""
+        if len(self.stages) == 1 and isinstance(self.stages[0], LutStage):
+            return self.stages[0].table
+        return None
+
+    def apply_channels(self, r, g, b):
+        """Filter three uint8 channel planes in place"""
+        planes = [p if p.ndim >= 2 else p.reshape(1, -1) for p in (r, g, b)]
+        height, width = planes[0].shape[:2]
+        if len(self.stages) == 1 and isinstance(self.stages[0], LutStage):
+            self.stages[0].apply(planes, 0, height, width)
+            return
+        # Every stage runs on one block of rows before moving to the next
+        step = max(1, MATRIX_BLOCK_PIXELS // max(1, width))
+        for top in range(0, height, step):
+            block = [p[top:top + step] for p in planes]
+            for stage in self.stages:
+                stage.apply(block, top, height, width)
+
+    def apply_array(self, array, channel_order="rgb"):
+        """Filter an H x W x C uint8 array in place; channel_order names the first three channels"""
+        r, g, b = (array[..., channel_order.index(c)] for c in "rgb")
+        self.apply_channels(r, g, b)
+
+    def preview_kernel(self, channel_order="bgr"):
+        """Tables for OpenCV's per-frame fast paths, see filters.preview_kernel"""
+        if len(self.stages) != 1 or self.stages[0].spatial:
+            return "chain", self
+        stage = self.stages[0]
+        if isinstance(stage, LutStage):
+            table = np.empty((1, 256, 3), dtype=np.uint8)
+            for channel, lut in zip("rgb", stage.table):
+                table[0, :, channel_order.index(channel)] = lut
+            return "lut", table
+        matrix = np.zeros((3, 4), dtype=np.float32)
+        for out_channel, row, offset in zip("rgb", stage.rows, stage.offset):
+            for in_channel, weight in zip("rgb", row):
+                matrix[channel_order.index(out_channel), channel_order.index(in_channel)] = weight
+            # cv2.transform rounds to nearest; the -0.5 makes it truncate instead
+            matrix[channel_order.index(out_channel), 3] = offset - 0.5
+        return "matrix", matrix
+
+
+class FilterRegistry:
+    """Ordered set of named filters and effects.
+
+    Iterating yields the filter names. Effects are chains too, meant to be
+    stacked on a filter: "sepia+grain+vignette" names sepia followed by
+    both effects, compiled on first use into one fused chain.
+    """
+
+    def __init__(self):
+        self._filters = {}
+        self._combined = {}
+
+    def register(self, name, ops, label=None, kind="filter"):
+        if "+" in name:
+            raise FilterError(f"filter names cannot contain '+': {name!r}")
+        try:
+            compiled = CompiledFilter(name, ops, compile_ops(ops), label, kind)
+        except FilterError as exc:
+            raise FilterError(f"filter {name!r}: {exc}") from None
+        self._filters[name] = compiled
+        self._combined.clear()
+        return compiled
+
+    def get(self, name):
+        if not isinstance(name, str):
+            return None
+        if name in self._filters:
+            return self._filters[name]
+        if "+" not in name:
+            return None
+        if name not in self._combined:
+            parts = [self._filters.get(part) for part in name.split("+")]
+            if None in parts:
+                return None
+            ops = [op for part in parts for op in part.ops]
+            self._combined[name] = CompiledFilter(name, ops, compile_ops(ops), parts[0].label)
+        return self._combined[name]
+
+    def __getitem__(self, name):
+        compiled = self.get(name)
+        if compiled is None:
+            raise KeyError(name)
+        return compiled
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return iter([name for name, f in self._filters.items() if f.kind == "filter"])
+
+    def __len__(self):
+        return sum(1 for f in self._filters.values() if f.kind == "filter")
+
+    def effects(self):
+        return [name for name, f in self._filters.items() if f.kind == "effect"]
+
+    def label(self, name):
+        return self[name].label
+
+    def load(self, path):
+        """Register every filter in a JSON or TOML file; returns their names"""
+        try:
+            if path.endswith(".toml"):
+                if tomllib is None:
+                    raise FilterError("reading TOML needs Python 3.11 or newer")
+                with open(path, "rb") as fh:
+                    data = tomllib.load(fh)
+            else:
+                with open(path) as fh:
+                    data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise FilterError(f"{path}: {exc}") from None
+        filters = data.get("filters") if isinstance(data, dict) else None
+        if not isinstance(filters, dict):
+            raise FilterError(f"{path}: expected a 'filters' table")
+        names = []
+        for name, spec in filters.items():
+            if isinstance(spec, dict):
+                ops, label, kind = spec.get("ops", []), spec.get("label"), spec.get("kind", "filter")
+            else:
+                ops, label, kind = spec, None, "filter"
+            try:
+                self.register(name, ops, label, kind)
+            except FilterError as exc:
+                raise FilterError(f"{path}: {exc}") from None
+            names.append(name)
+        return names
+
+    def load_env(self, variable="PHOTOBOOTH_FILTERS"):
+        """Load the files and directories listed in an environment variable"""
+        for entry in filter(None, os.environ.get(variable, "").split(os.pathsep)):
+            if os.path.isdir(entry):
+                paths = sorted(glob.glob(os.path.join(entry, "*.json"))
+                               + glob.glob(os.path.join(entry, "*.toml")))
+            else:
+                paths = [entry]
+            for path in paths:
+                self.load(path)
@@ -0,0 +1,375 @@
+"""Print and share spooler for finished strips.
+
+Saved strips are handed to a Spooler, which fans each one out to its
+routes, typically a printer and a share kiosk. Every route has a bounded
+queue and its own asyncio task. A printer route batches strips onto
+sheets, two 2x6 strips side by side on one 4x6 sheet, or sends a lone
+strip after batch_timeout seconds. Failed sends are retried with
+exponential backoff. When a route's queue is full, submit() blocks, so a
+slow sink holds up the writer thread instead of letting the backlog grow
+without bound.
+
+Sinks are a directory (a printer hot folder, or any local stand-in) or a
+TCP socket taking a "<name> <size>\\n" header and the file, and answering
+"OK\\n". The event loop runs on its own thread; the booth only calls
+submit() and after_write().
+
+    PHOTOBOOTH_PRINTER=/var/spool/booth      two strips per sheet
+    PHOTOBOOTH_SHARE=localhost:9100          one strip at a time
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from photobooth.export import FORMATS, encode_image
+from photobooth.trace import TRACER, percentile
+
+log = logging.getLogger(__name__)
+
+MAX_PENDING = 8
+BATCH_TIMEOUT = 5.0
+RETRIES = 3
+BACKOFF = 0.5
+SOCKET_TIMEOUT = 10.0
+LATENCY_HISTORY = 1000
+SHUTDOWN_TIMEOUT = 60.0
+
+
+class SpoolError(Exception):
+    pass
+
+
+class SpoolJob:
+    def __init__(self, path):
+        self.path = path
+        self.submitted_at = time.perf_counter()
+
+
+class SpoolItem:
+    """What a sink receives: a file name and its encoded bytes"""
+
+    def __init__(self, name, data, jobs):
+        self.name = name
+        self.data = data
+        self.jobs = jobs
+
+
+class DirectorySink:
+    """Drops items into a directory, renamed into place once complete"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def send(self, item):
+        await asyncio.to_thread(self._write, item)
+
+    def _write(self, item):
+        path = os.path.join(self.directory, item.name)
+        temp_path = os.path.join(self.directory, f".{item.name}.tmp")
+        with open(temp_path, "wb") as fh:
+            fh.write(item.data)
+        os.replace(temp_path, path)
+
+    def __repr__(self):
+        return f"DirectorySink({self.directory!r})"
+
+
+class SocketSink:
+    """Sends each item over a new TCP connection and waits for an OK line"""
+
+    def __init__(self, host, port, timeout=SOCKET_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    async def send(self, item):
+        await asyncio.wait_for(self._send(item), self.timeout)
+
+    async def _send(self, item):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(f"{item.name} {len(item.data)}\n".encode())
+            writer.write(item.data)
+            await writer.drain()
+            reply = await reader.readline()
+            if reply.strip() != b"OK":
+                raise SpoolError(f"{self.host}:{self.port} answered {reply.strip()!r}")
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    def __repr__(self):
+        return f"SocketSink({self.host!r}, {self.port})"
+
+
+def parse_sink(text):
+    """A "host:port" socket or a directory path"""
+    host, sep, port = text.rpartition(":")
+    if sep and host and port.isdigit() and not os.path.isdir(text):
+        return SocketSink(host, int(port))
+    return DirectorySink(text)
+
+
+def compose_sheet(images, bg_color="#FFFFFF"):
+    """Lay strips out side by side, each in an equal share of the sheet width"""
+    cell_w = max(image.width() for image in images)
+    height = max(image.height() for image in images)
+    sheet = QImage(cell_w * len(images), height, QImage.Format.Format_RGB32)
+    sheet.fill(QColor(bg_color))
+    painter = QPainter(sheet)
+    for i, image in enumerate(images):
+        x = i * cell_w + (cell_w - image.width()) // 2
+        painter.drawImage(x, (height - image.height()) // 2, image)
+    painter.end()
+    if images[0].dotsPerMeterX():
+        sheet.setDotsPerMeterX(images[0].dotsPerMeterX())
+        sheet.setDotsPerMeterY(images[0].dotsPerMeterY())
+    return sheet
+
+
+class Route:
+    """One destination: a sink, how many strips go on a sheet, and its counters"""
+
+    def __init__(self, name, sink, batch=1, batch_timeout=BATCH_TIMEOUT,
+                 max_pending=MAX_PENDING, retries=RETRIES, backoff=BACKOFF):
+        self.name = name
+        self.sink = sink
+        self.batch = batch
+        self.batch_timeout = batch_timeout
+        self.max_pending = max_pending
+        self.retries = retries
+        self.backoff = backoff
+        self.queue = None
+        self.sent_jobs = 0
+        self.sent_items = 0
+        self.failed_jobs = 0
+        self.retried = 0
+        self.latency_ms = deque(maxlen=LATENCY_HISTORY)
+        self.started_at = None
+
+    async def prepare(self, jobs):
+        """Read the strips and, for batched routes, compose them into one sheet"""
+        if len(jobs) == 1 and self.batch == 1:
+            data = await asyncio.to_thread(_read, jobs[0].path)
+            return SpoolItem(os.path.basename(jobs[0].path), data, jobs)
+        return await asyncio.to_thread(self._sheet, jobs)
+
+    def _sheet(self, jobs):
+        images = []
+        for job in jobs:
+            image = QImage(job.path)
+            if image.isNull():
+                raise SpoolError(f"could not read {job.path}")
+            images.append(image)
+        stem, ext = os.path.splitext(os.path.basename(jobs[0].path))
+        fmt = FORMATS.get(ext.lower(), "PNG")
+        name = f"sheet-{stem}" + (f"+{len(jobs) - 1}" if len(jobs) > 1 else "") + ext
+        return SpoolItem(name, encode_image(compose_sheet(images), fmt), jobs)
+
+    def stats(self):
+        ordered = sorted(self.latency_ms)
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "pending": self.queue.qsize() if self.queue is not None else 0,
+            "sent": self.sent_jobs,
+            "items": self.sent_items,
+            "failed": self.failed_jobs,
+            "retried": self.retried,
+            "per_minute": self.sent_jobs * 60 / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(ordered, 0.50),
+            "p95_ms": percentile(ordered, 0.95),
+        }
+
+
+def _read(path):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+class Spooler:
+    """Fans submitted strip paths out to every route.
+
+    Use it from asyncio with `await put(path)` and `await drain()` inside
+    run(), or from other threads with start(), submit() and close().
+    """
+
+    def __init__(self, routes):
+        self.routes = list(routes)
+        self._loop = None
+        self._thread = None
+        self._tasks = []
+        self._ready = threading.Event()
+
+    async def _start_routes(self):
+        for route in self.routes:
+            route.queue = asyncio.Queue(route.max_pending)
+            self._tasks.append(asyncio.create_task(self._work(route), name=f"spool-{route.name}"))
+
+    async def put(self, path):
+        """Queue a strip on every route, waiting while a route's queue is full"""
+        job = SpoolJob(path)
+        for route in self.routes:
+            if route.started_at is None:
+                route.started_at = job.submitted_at
+            await route.queue.put(job)
+
+    async def drain(self):
+        """Wait until every queued strip has been sent or given up on"""
+        for route in self.routes:
+            await route.queue.join()
+
+    async def _stop_routes(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run(self, main):
+        """Run main(spooler), a coroutine function, with the routes working"""
+        await self._start_routes()
+        try:
+            return await main(self)
+        finally:
+            await self._stop_routes()
+
+    async def _next_batch(self, route):
+        jobs = [await route.queue.get()]
+        deadline = time.monotonic() + route.batch_timeout
+        while len(jobs) < route.batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(await asyncio.wait_for(route.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return jobs
+
+    async def _work(self, route):
+        while True:
+            jobs = await self._next_batch(route)
+            try:
+                await self._send(route, jobs)
+            except Exception:
+                # Keep the route running whatever one batch does
+                route.failed_jobs += len(jobs)
+                log.exception("%s: could not send %s", route.name, ", ".join(job.path for job in jobs))
+            finally:
+                for _ in jobs:
+                    route.queue.task_done()
+
+    async def _send(self, route, jobs):
+        for attempt in range(route.retries + 1):
+            try:
+                item = await route.prepare(jobs)
+                await route.sink.send(item)
+                break
+            except (OSError, SpoolError, asyncio.TimeoutError) as exc:
+                if attempt == route.retries:
+                    route.failed_jobs += len(jobs)
+                    log.error("%s: giving up on %s after %d attempts: %s", route.name,
+                              ", ".join(job.path for job in jobs), attempt + 1, exc)
+                    return
+                route.retried += 1
+                delay = route.backoff * 2 ** attempt
+                log.warning("%s: send failed (%s), retrying in %.1fs", route.name, exc, delay)
+                await asyncio.sleep(delay)
+        now = time.perf_counter()
+        route.sent_items += 1
+        route.sent_jobs += len(jobs)
+        for job in jobs:
+            route.latency_ms.append((now - job.submitted_at) * 1000)
+            TRACER.record(f"spool.{route.name}", job.submitted_at, now)
+
+    def stats(self):
+        return {route.name: route.stats() for route in self.routes}
+
+    # Thread interface, for the booth
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_loop, name="spooler", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._start_routes())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._stop_routes())
+            self._loop.close()
+
+    def submit(self, path, timeout=None):
+        """Queue a strip from another thread; blocks while a route is full.
+
+        Returns False if timeout seconds pass first; the strip is then still
+        queued on the routes that had room.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.put(path), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def after_write(self, then=None):
+        """An on_done(path, error) for StripWriter that spools each written strip"""
+
+        def on_done(path, error):
+            if error is None:
+                self.submit(path)
+            if then is not None:
+                then(path, error)
+
+        return on_done
+
+    def close(self, timeout=None):
+        """Send what is queued, then stop the loop"""
+        if self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.drain(), self._loop).result(timeout)
+        except TimeoutError:
+            log.warning("spooler closed with strips still queued")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+
+_default_spooler = None
+
+
+def default_spooler():
+    """The shared spooler for PHOTOBOOTH_PRINTER and PHOTOBOOTH_SHARE, or None if neither is set"""
+    global _default_spooler
+    if _default_spooler is None:
+        routes = []
+        printer = os.environ.get("PHOTOBOOTH_PRINTER")
+        if printer:
+            routes.append(Route("printer", parse_sink(printer), batch=2))
+        share = os.environ.get("PHOTOBOOTH_SHARE")
+        if share:
+            routes.append(Route("share", parse_sink(share)))
+        if not routes:
+            return None
+        _default_spooler = Spooler(routes).start()
+    return _default_spooler
+
+
+def close_default_spooler(timeout=SHUTDOWN_TIMEOUT):
+    """Send the shared spooler's queued strips and stop it, if it was ever started"""
+    global _default_spooler
+    if _default_spooler is not None:
+        _default_spooler.close(timeout)
+        _default_spooler = None
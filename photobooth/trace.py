@@ -0,0 +1,216 @@
+"""Optional timers and counters for the stages of a booth session.
+
+Tracing is off unless PHOTOBOOTH_TRACE is set (or main.py gets --trace).
+While off, span() hands back one shared do-nothing context manager and
+count() returns straight away, so the instrumented code pays one attribute
+check per call.
+
+While on, every span keeps its last TRACE_HISTORY durations for rolling
+p50/p95/p99, counters keep running totals, a summary is logged every
+PHOTOBOOTH_TRACE_INTERVAL seconds, and the events are written as Chrome
+trace-event JSON (open in chrome://tracing or ui.perfetto.dev) on exit.
+
+    PHOTOBOOTH_TRACE=1                    summary log only
+    PHOTOBOOTH_TRACE=/tmp/booth.json      summary log and trace file
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# Durations kept per span name for the percentiles
+TRACE_HISTORY = 1024
+# Trace events kept for export; the oldest are dropped past this
+TRACE_EVENTS = 200_000
+SUMMARY_INTERVAL = 30.0
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, history=TRACE_HISTORY, max_events=TRACE_EVENTS):
+        self.enabled = False
+        self.path = None
+        self.history = history
+        self.durations = {}
+        self.totals = {}
+        self.counters = {}
+        self.events = deque(maxlen=max_events)
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._reporter = None
+        self._stop = threading.Event()
+
+    def enable(self, path=None, interval=SUMMARY_INTERVAL):
+        """Start recording; write a trace to path on exit and log a summary every interval seconds"""
+        if not self.enabled:
+            self.enabled = True
+            atexit.register(self.shutdown)
+        self.path = path or self.path
+        if interval and self._reporter is None:
+            self._stop.clear()
+            self._reporter = threading.Thread(
+                target=self._report, args=(interval,), name="trace-summary", daemon=True)
+            self._reporter.start()
+        return self
+
+    def enable_from_env(self):
+        """Read PHOTOBOOTH_TRACE ("1" or a trace file path) and PHOTOBOOTH_TRACE_INTERVAL"""
+        value = os.environ.get("PHOTOBOOTH_TRACE", "")
+        if value in ("", "0"):
+            return self
+        interval = float(os.environ.get("PHOTOBOOTH_TRACE_INTERVAL", SUMMARY_INTERVAL))
+        return self.enable(None if value == "1" else value, interval)
+
+    def span(self, name, **args):
+        """Context manager timing the enclosed block under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, start, end, args=None):
+        """Add a span measured elsewhere, start and end from time.perf_counter()"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        event = {
+            "name": name, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+            "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = deque(maxlen=self.history)
+                self.totals[name] = 0
+            durations.append((end - start) * 1000)
+            self.totals[name] += 1
+            self._threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            value = self.counters[name] = self.counters.get(name, 0) + n
+            self.events.append({
+                "name": name, "ph": "C", "pid": os.getpid(),
+                "ts": (time.perf_counter() - self._origin) * 1e6, "args": {"value": value},
+            })
+
+    def summary(self):
+        """{name: {count, p50, p95, p99, max}} in ms for spans, plus the counters"""
+        with self._lock:
+            spans = {name: (sorted(d), self.totals[name]) for name, d in self.durations.items()}
+            counters = dict(self.counters)
+        stats = {}
+        for name, (ordered, total) in spans.items():
+            stats[name] = {
+                "count": total,
+                "p50": percentile(ordered, 0.50),
+                "p95": percentile(ordered, 0.95),
+                "p99": percentile(ordered, 0.99),
+                "max": ordered[-1] if ordered else 0.0,
+            }
+        return stats, counters
+
+    def log_summary(self):
+        stats, counters = self.summary()
+        if not stats and not counters:
+            return
+        lines = [f"{'stage':<24} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for name, s in sorted(stats.items()):
+            lines.append(f"{name:<24} {s['count']:>7} {s['p50']:>7.2f}ms {s['p95']:>7.2f}ms "
+                         f"{s['p99']:>7.2f}ms {s['max']:>7.2f}ms")
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name:<24} {value:>7}")
+        log.info("timings\n%s", "\n".join(lines))
+
+    def export(self, path):
+        """Write the recorded events as Chrome trace-event JSON"""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": name}})
+        with open(path, "w") as fh:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.durations.clear()
+            self.totals.clear()
+            self.counters.clear()
+            self.events.clear()
+            self._threads.clear()
+
+    def shutdown(self):
+        """Stop the summary thread, log a last summary and write the trace file, if any"""
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join(1.0)
+            self._reporter = None
+        if not self.enabled:
+            return
+        self.log_summary()
+        if self.path:
+            try:
+                self.export(self.path)
+                log.info("trace written to %s", self.path)
+            except OSError as exc:
+                log.warning("could not write trace %s: %s", self.path, exc)
+
+    def _report(self, interval):
+        while not self._stop.wait(interval):
+            self.log_summary()
+
+
+TRACER = Tracer().enable_from_env()
+
+
+def span(name, **args):
+    if not TRACER.enabled:
+        return _NULL_SPAN
+    return _Span(TRACER, name, args)
+
+
+def count(name, n=1):
+    if TRACER.enabled:
+        TRACER.count(name, n)
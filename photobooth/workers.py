@@ -0,0 +1,279 @@
+"""Run render work on Qt's thread pool and report back through signals.
+
+When several booths share one process, FairPool takes Qt's place: each
+booth queues on its own lane and the workers take turns between lanes.
+"""
+
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+
+from photobooth.trace import TRACER, percentile
+
+log = logging.getLogger(__name__)
+
+LATENCY_HISTORY = 1000
+
+
+class PoolClosed(RuntimeError):
+    pass
+
+
+def render_pool():
+    return QThreadPool.globalInstance()
+
+
+class TaskSignals(QObject):
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+
+
+class Task(QRunnable):
+    def __init__(self, index, func, *args):
+        super().__init__()
+        self.index = index
+        self.func = func
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            value = self.func(*self.args)
+        except Exception:
+            self._emit("error", traceback.format_exc())
+        else:
+            self._emit("result", value)
+
+    def _emit(self, name, value):
+        try:
+            getattr(self.signals, name).emit(self.index, value)
+        except RuntimeError:
+            # The receiver went away (window closed or app shutting down)
+            pass
+
+
+class TaskBatch(QObject):
+    """A group of tasks started together, one per item.
+
+    result fires for every task as it completes, progress after each one,
+    and finished once with all values in submission order. Failed tasks
+    leave None in their slot.
+    """
+
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(list)
+
+    def __init__(self, func, items, pool=None, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.items = list(items)
+        self.pool = pool or render_pool()
+        self.total = len(self.items)
+        self.values = [None] * self.total
+        self.done = 0
+        self.cancelled = False
+        # Keep the signal objects alive until their tasks report back
+        self._signals = []
+
+    def start(self):
+        """Queue every task; on a pool that is already closed the batch is cancelled instead"""
+        if not self.items:
+            self.finished.emit([])
+            return
+        for index, item in enumerate(self.items):
+            task = Task(index, self.func, *item)
+            task.signals.result.connect(self._on_result)
+            task.signals.error.connect(self._on_error)
+            try:
+                self.pool.start(task)
+            except PoolClosed:
+                # Shutting down: only the tasks already queued will report back
+                self.items = []
+                self.total = index
+                self.cancel()
+                return
+            self._signals.append(task.signals)
+        # The tasks hold their own arguments
+        self.items = []
+
+    def cancel(self):
+        """Stop reporting; the batch deletes itself once its running tasks finish"""
+        self.cancelled = True
+        self.values = [None] * self.total
+        if self.done == self.total:
+            self.deleteLater()
+
+    def _on_result(self, index, value):
+        if not self.cancelled:
+            self.values[index] = value
+            self.result.emit(index, value)
+        self._advance()
+
+    def _on_error(self, index, message):
+        if not self.cancelled:
+            self.error.emit(index, message)
+        self._advance()
+
+    def _advance(self):
+        self.done += 1
+        if self.done == self.total:
+            self._signals.clear()
+        if self.cancelled:
+            if self.done == self.total:
+                self.deleteLater()
+            return
+        self.progress.emit(self.done, self.total)
+        if self.done == self.total:
+            self.finished.emit(self.values)
+
+
+class ThreadCallback(QObject):
+    """Callable that can be handed to plain threads; calls func on its owner's thread"""
+
+    fired = pyqtSignal(tuple)
+
+    def __init__(self, func, parent=None):
+        super().__init__(parent)
+        self.fired.connect(lambda args: func(*args))
+
+    def __call__(self, *args):
+        try:
+            self.fired.emit(args)
+        except RuntimeError:
+            # The owner went away before the thread finished
+            pass
+
+
+class PoolLane:
+    """One booth's queue on a FairPool.
+
+    start() takes the QRunnables TaskBatch makes, so a lane can be passed
+    as TaskBatch's pool; submit() runs any function and returns a Future.
+    """
+
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+        self.queue = deque()
+        self.queued = False
+        self.done = 0
+        self.wait_ms = deque(maxlen=LATENCY_HISTORY)
+        self.run_ms = deque(maxlen=LATENCY_HISTORY)
+
+    def start(self, runnable):
+        self.pool._put(self, (time.perf_counter(), runnable.run, (), None))
+
+    def submit(self, func, *args):
+        future = Future()
+        self.pool._put(self, (time.perf_counter(), func, args, future))
+        return future
+
+    def _run(self, item):
+        queued_at, func, args, future = item
+        if future is not None and not future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        try:
+            value = func(*args)
+        except BaseException as exc:
+            if future is None:
+                log.exception("%s: task failed", self.name)
+            else:
+                future.set_exception(exc)
+        else:
+            if future is not None:
+                future.set_result(value)
+        end = time.perf_counter()
+        self.done += 1
+        self.wait_ms.append((start - queued_at) * 1000)
+        self.run_ms.append((end - start) * 1000)
+        TRACER.record(f"pool.{self.name}", start, end)
+
+    def stats(self):
+        waits = sorted(self.wait_ms)
+        runs = sorted(self.run_ms)
+        return {
+            "queued": len(self.queue),
+            "done": self.done,
+            "wait_p50_ms": percentile(waits, 0.50),
+            "wait_p95_ms": percentile(waits, 0.95),
+            "run_p50_ms": percentile(runs, 0.50),
+        }
+
+
+class FairPool:
+    """Worker threads shared by several booths, taking turns between them.
+
+    Lanes with queued work wait in line; a worker takes one task from the
+    lane at the front and sends it to the back. A booth that queues a lot
+    at once, such as a print-size export, then holds up the others by at
+    most one task per worker instead of by its whole queue.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or QThread.idealThreadCount()
+        self.lanes = {}
+        self._turns = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+
+    def lane(self, name):
+        with self._cond:
+            if name not in self.lanes:
+                self.lanes[name] = PoolLane(self, name)
+            return self.lanes[name]
+
+    def _put(self, lane, item):
+        with self._cond:
+            if self._closed:
+                raise PoolClosed("pool is closed")
+            lane.queue.append(item)
+            if not lane.queued:
+                lane.queued = True
+                self._turns.append(lane)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"fair-pool-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            while not self._turns and not self._closed:
+                self._cond.wait()
+            if not self._turns:
+                return None, None
+            lane = self._turns.popleft()
+            item = lane.queue.popleft()
+            if lane.queue:
+                self._turns.append(lane)
+            else:
+                lane.queued = False
+            return lane, item
+
+    def _work(self):
+        while True:
+            lane, item = self._take()
+            if lane is None:
+                return
+            lane._run(item)
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def close(self):
+        """Finish what is queued, then stop the workers"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
@@ -0,0 +1,249 @@
+"""Background writer queue for finished strips.
+
+Encoding and disk writes happen on one writer thread so the booth can start
+the next session right away. Every strip gets a unique timestamped name,
+and files are written to a temporary name in the target directory and
+renamed into place, so a crash never leaves a half-written strip behind.
+Given a pool, such as a booth's FairPool lane, the writer thread hands
+encoding to it and only writes the bytes itself.
+"""
+
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+
+from photobooth.export import write_image
+from photobooth.trace import TRACER
+
+log = logging.getLogger(__name__)
+
+# mkstemp creates files readable only by the owner; finished strips get the usual mode
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+EXTENSIONS = {"png": ".png", "jpg": ".jpg", "jpeg": ".jpg", "webp": ".webp"}
+
+
+class EncoderSettings:
+    def __init__(self, fmt="png", quality=90, png_level=6):
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"unsupported format {fmt!r}")
+        self.fmt = fmt
+        self.quality = quality
+        self.png_level = png_level
+
+    @classmethod
+    def from_env(cls):
+        """Read PHOTOBOOTH_FORMAT, PHOTOBOOTH_QUALITY and PHOTOBOOTH_PNG_LEVEL"""
+        return cls(
+            fmt=os.environ.get("PHOTOBOOTH_FORMAT", "png").lower(),
+            quality=int(os.environ.get("PHOTOBOOTH_QUALITY", 90)),
+            png_level=int(os.environ.get("PHOTOBOOTH_PNG_LEVEL", 6)),
+        )
+
+    @property
+    def extension(self):
+        return EXTENSIONS[self.fmt]
+
+
+class WriteJob:
+    def __init__(self, path, image=None, render=None, dpi=None, on_done=None):
+        self.path = path
+        self.image = image
+        self.render = render
+        self.dpi = dpi
+        self.on_done = on_done
+        self.queued_at = time.perf_counter()
+
+
+def encode_job(path, image, dpi, quality, png_level):
+    """A whole QImage encoded as it would be written to path"""
+    buffer = io.BytesIO()
+    write_image(buffer, path, image, dpi, quality, png_level)
+    return buffer.getvalue()
+
+
+class StripWriter:
+    """Single background thread that encodes and writes queued strips.
+
+    A job's on_done(path, error) is called on the writer thread once it is
+    written; error is None on success. pool is anything with a
+    submit(func, *args) returning a Future to encode on.
+    """
+
+    def __init__(self, directory, encoder=None, prefix="photostrip", history=100, pool=None):
+        self.directory = directory
+        self.encoder = encoder or EncoderSettings()
+        self.prefix = prefix
+        self.pool = pool
+        self.written = 0
+        self.failed = 0
+        self.encode_ms = deque(maxlen=history)
+        self.write_ms = deque(maxlen=history)
+        self.wait_ms = deque(maxlen=history)
+        self._queue = queue.Queue()
+        self._reserved = set()
+        self._lock = threading.Lock()
+        # Notified whenever the last queued job is done
+        self._idle = threading.Condition(self._lock)
+        self._busy = 0
+        self._thread = None
+
+    def reserve_path(self):
+        """Return a new unique, timestamped output path"""
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        with self._lock:
+            for n in range(1000):
+                name = f"{self.prefix}-{stamp}" + (f"-{n}" if n else "") + self.encoder.extension
+                path = os.path.join(self.directory, name)
+                if path not in self._reserved and not os.path.exists(path):
+                    self._reserved.add(path)
+                    return path
+        raise FileExistsError(f"no free file name for {self.prefix}-{stamp}")
+
+    def submit(self, image, dpi=None, on_done=None):
+        """Queue a QImage to be encoded; returns the path it will be written to"""
+        return self._put(WriteJob(self.reserve_path(), image=image, dpi=dpi, on_done=on_done))
+
+    def submit_render(self, render, on_done=None):
+        """Queue render(temp_path), a function that writes the file itself"""
+        return self._put(WriteJob(self.reserve_path(), render=render, on_done=on_done))
+
+    def _put(self, job):
+        with self._lock:
+            self._busy += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="strip-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job.path
+
+    @property
+    def depth(self):
+        """Jobs queued or in progress"""
+        return self._busy
+
+    def stats(self):
+        def mean(values):
+            return sum(values) / len(values) if values else 0.0
+
+        return {
+            "depth": self.depth,
+            "written": self.written,
+            "failed": self.failed,
+            "wait_ms": mean(self.wait_ms),
+            "encode_ms": mean(self.encode_ms),
+            "write_ms": mean(self.write_ms),
+        }
+
+    def wait(self, timeout=None):
+        """Block until every queued job has been written and its on_done has returned"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._busy == 0, timeout)
+
+    def close(self):
+        """Finish every queued job, then stop the writer thread"""
+        self.wait()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            error = None
+            try:
+                self._write(job)
+                self.written += 1
+            except Exception as exc:
+                error = exc
+                self.failed += 1
+                log.error("could not write %s: %s", job.path, exc)
+            try:
+                if job.on_done is not None:
+                    job.on_done(job.path, error)
+            except Exception:
+                log.exception("callback for %s failed", job.path)
+            finally:
+                # Only now is the job done, so wait() covers its callback too
+                with self._lock:
+                    self._reserved.discard(job.path)
+                    self._busy -= 1
+                    if not self._busy:
+                        self._idle.notify_all()
+
+    def _write(self, job):
+        start = time.perf_counter()
+        self.wait_ms.append((start - job.queued_at) * 1000)
+        directory, name = os.path.split(job.path)
+        stem, ext = os.path.splitext(name)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{stem}.", suffix=".tmp" + ext, dir=directory)
+        try:
+            if job.render is not None:
+                os.close(fd)
+                if self.pool is not None:
+                    self.pool.submit(job.render, temp_path).result()
+                else:
+                    job.render(temp_path)
+                encoded = time.perf_counter()
+                with open(temp_path, "rb") as fh:
+                    os.fsync(fh.fileno())
+            else:
+                with os.fdopen(fd, "wb") as fh:
+                    if self.pool is not None:
+                        fh.write(self.pool.submit(encode_job, job.path, job.image, job.dpi,
+                                                  self.encoder.quality, self.encoder.png_level).result())
+                    else:
+                        write_image(fh, job.path, job.image, job.dpi,
+                                    self.encoder.quality, self.encoder.png_level)
+                    encoded = time.perf_counter()
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+            os.replace(temp_path, job.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        done = time.perf_counter()
+        self.encode_ms.append((encoded - start) * 1000)
+        self.write_ms.append((done - encoded) * 1000)
+        TRACER.record("strip.queue_wait", job.queued_at, start)
+        TRACER.record("strip.encode", start, encoded)
+        TRACER.record("strip.write", encoded, done)
+        log.info("wrote %s (encode %.0f ms, write %.0f ms, %d queued)",
+                 job.path, self.encode_ms[-1], self.write_ms[-1], self._busy - 1)
+
+
+def downloads_dir():
+    downloads = os.path.join(os.path.expanduser("~"), "Downloads")
+    os.makedirs(downloads, exist_ok=True)
+    return downloads
+
+
+_default_writer = None
+
+
+def default_writer():
+    """The shared writer for ~/Downloads, created on first use"""
+    global _default_writer
+    if _default_writer is None:
+        _default_writer = StripWriter(downloads_dir(), EncoderSettings.from_env())
+    return _default_writer
+
+
+def close_default_writer():
+    """Finish the shared writer's strips, callbacks included, if it was ever used"""
+    global _default_writer
+    if _default_writer is not None:
+        _default_writer.close()
+        _default_writer = None
@@ -0,0 +1,44 @@
+"""Every strip the writer saves ends up in the session archive."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.archive import SessionArchive
+from photobooth.writer import StripWriter
+
+app = QApplication.instance() or QApplication([])
+
+STRIPS = 5
+
+
+def image(color, size=(64, 48)):
+    result = QImage(*size, QImage.Format.Format_RGB32)
+    result.fill(QColor(color))
+    return result
+
+
+def test_every_saved_strip_is_archived(tmp_path):
+    archive = SessionArchive(str(tmp_path / "archive.sqlite"))
+    writer = StripWriter(str(tmp_path))
+    frames = [image("#ff0000"), image("#00ff00"), image("#0000ff")]
+    saved = []
+    for _ in range(STRIPS):
+        on_done = archive.after_write(frames, "sepia", "#723A03", "#FFFDD0",
+                                      then=lambda path, error: saved.append(path))
+        writer.submit(image("#FFFDD0", (220, 330)), on_done=on_done)
+    # Once the writer is idle, the last strip has been archived too
+    assert writer.wait(10)
+
+    assert len(saved) == STRIPS
+    assert len(archive) == STRIPS
+    rows = archive.page(limit=STRIPS)
+    assert sorted(archive.session(id).strip_path for id, *_ in rows) == sorted(saved)
+    assert all(archive.strip(id) for id, *_ in rows)
+    writer.close()
+    archive.close()
@@ -0,0 +1,47 @@
+"""Burst recording stops cleanly when the shutter times out."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from photobooth import burst
+from photobooth.burst import BurstRecorder, BurstSettings, best_frame
+
+SHAPE = (48, 64, 3)
+
+
+def test_timeout_waits_for_the_frame_being_copied(monkeypatch):
+    recorder = BurstRecorder(BurstSettings(frames=3, before=1))
+    recorder.arm()
+    for value in (10, 20, 30):
+        recorder.push(np.full(SHAPE, value, dtype=np.uint8))
+
+    copying = threading.Event()
+    copyto = np.copyto
+
+    def slow_copyto(dst, src):
+        # Half the rows now, the rest after the shutter has timed out
+        copyto(dst[:SHAPE[0] // 2], src[:SHAPE[0] // 2])
+        copying.set()
+        time.sleep(0.2)
+        copyto(dst[SHAPE[0] // 2:], src[SHAPE[0] // 2:])
+
+    monkeypatch.setattr(burst.np, "copyto", slow_copyto)
+    # The camera overwrites the oldest slot, which frames() still returns
+    producer = threading.Thread(target=recorder.push, args=(np.full(SHAPE, 40, dtype=np.uint8),))
+    producer.start()
+    assert copying.wait(5)
+    best_frame(recorder, timeout=0)
+    frames = recorder.frames()
+    producer.join()
+
+    assert [int(frame[0, 0, 0]) for frame in frames] == [20, 30, 40]
+    assert all((frame == frame[0, 0, 0]).all() for frame in frames)
+    # Nothing more is recorded once the burst is finished
+    recorder.push(np.full(SHAPE, 50, dtype=np.uint8))
+    assert recorder.pushed == 4
@@ -0,0 +1,103 @@
+"""Session shots are copies of the camera ring, kept until their holder releases them."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from photobooth.camera import FrameRing, SessionFrames
+
+SHAPE = (48, 64, 3)
+
+
+def fill_ring(ring, value):
+    """Write one frame of value into every slot, as the capture thread would"""
+    for _ in range(ring.size):
+        seq, slot = ring.begin_write()
+        slot[...] = value
+        ring.publish(seq)
+
+
+def test_capture_does_not_alias_the_ring():
+    ring = FrameRing(SHAPE, size=4)
+    frames = SessionFrames(3)
+    seq, slot = ring.begin_write()
+    slot[...] = np.random.default_rng(0).integers(0, 256, SHAPE, dtype=np.uint8)
+    ring.publish(seq)
+    seq, slot = ring.latest()
+    index = frames.capture(slot, lambda: ring.intact(seq))
+    frame = frames.view(index)
+    expected = frame.copy()
+    assert not np.shares_memory(frame, slot)
+    assert not np.shares_memory(frame, ring.slots)
+
+    fill_ring(ring, 7)
+    assert not ring.intact(seq)
+    assert np.array_equal(frame, expected)
+
+
+def test_capture_drops_a_lapped_frame():
+    ring = FrameRing(SHAPE, size=2)
+    frames = SessionFrames(3)
+    fill_ring(ring, 1)
+    seq, slot = ring.latest()
+    fill_ring(ring, 2)
+    assert frames.capture(slot, lambda: ring.intact(seq)) is None
+    assert len(frames) == 0
+
+
+def test_reset_keeps_a_held_buffer():
+    frames = SessionFrames(3)
+    for value in (10, 20, 30):
+        frames.capture(np.full(SHAPE, value, dtype=np.uint8))
+    views = frames.views()
+    images = frames.images()
+    release = frames.hold()
+    old_buffer = frames.buffer
+
+    frames.reset()
+    for value in (40, 50, 60):
+        frames.capture(np.full(SHAPE, value, dtype=np.uint8))
+    assert frames.buffer is not old_buffer
+    assert not np.shares_memory(frames.buffer, old_buffer)
+    assert [int(view[0, 0, 0]) for view in views] == [10, 20, 30]
+    assert [image.pixelColor(0, 0).red() for image in images] == [10, 20, 30]
+    release()
+
+
+def test_released_buffer_is_the_next_spare():
+    frames = SessionFrames(3, size=SHAPE[1::-1])
+    first = frames.buffer
+    for value in (10, 20, 30):
+        frames.capture(np.full(SHAPE, value, dtype=np.uint8))
+    release_first = frames.hold()
+    frames.reset()
+    frames.allocate(SHAPE[1::-1])
+    second = frames.buffer
+    assert second is not first
+
+    release_first()
+    for value in (40, 50, 60):
+        frames.capture(np.full(SHAPE, value, dtype=np.uint8))
+    frames.hold()
+    frames.reset()
+    frames.allocate(SHAPE[1::-1])
+    assert frames.buffer is first
+    assert frames.allocations == 2
+
+
+def test_reset_reuses_an_unheld_buffer():
+    frames = SessionFrames(3, size=SHAPE[1::-1])
+    buffer = frames.buffer
+    for value in (10, 20, 30):
+        frames.capture(np.full(SHAPE, value, dtype=np.uint8))
+    views = frames.views()
+    frames.reset()
+    frames.capture(np.full(SHAPE, 40, dtype=np.uint8))
+    # Stray views don't matter; only hold() keeps the buffer from being reused
+    assert frames.buffer is buffer
+    assert int(views[0][0, 0, 0]) == 40
+    assert frames.allocations == 1
@@ -0,0 +1,27 @@
+"""Banded strip export."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.cache import FilterCache
+from photobooth.export import export_strip
+from photobooth.pipeline import RenderSettings
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_export_fills_an_empty_cache_it_is_given(tmp_path):
+    source = QImage(640, 480, QImage.Format.Format_RGB32)
+    source.fill(QColor("#3366aa"))
+    cache = FilterCache()
+    path = str(tmp_path / "strip.png")
+    export_strip([source] * 3, "sepia", "#723A03", "#FFFDD0", path,
+                 RenderSettings(export_dpi=192), keys=["a", "b", "c"], cache=cache)
+    assert len(cache) == 3
+    assert QImage(path).size().width() == 440
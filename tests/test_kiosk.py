@@ -0,0 +1,148 @@
+"""Kiosk sessions run back to back on a played-back camera."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+import pytest
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.perf_counter() + timeout
+    loop = QEventLoop()
+    while not condition() and time.perf_counter() < deadline:
+        QTimer.singleShot(5, loop.quit)
+        loop.exec()
+    return condition()
+
+
+@pytest.fixture
+def clip(tmp_path, monkeypatch):
+    monkeypatch.setenv("PHOTOBOOTH_ARCHIVE", "0")
+    monkeypatch.setenv("PHOTOBOOTH_BURST_FRAMES", "3")
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 240))
+    for i in range(30):
+        frame = np.full((240, 320, 3), (200, 222, 245), dtype=np.uint8)
+        cv2.circle(frame, (320 * i // 30, 120), 60, (3, 58, 114), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def kiosk(clip, directory):
+    import main as booth_app
+    from photobooth.writer import StripWriter
+
+    booth = booth_app.KioskWindow(booth_app.camera_source(clip), writer=StripWriter(directory))
+    booth.show()
+    return booth
+
+
+def take_shots(booth):
+    """Run the camera screen through its three shots, skipping the countdown wait"""
+    booth.home.open_camera_window()
+    camera = booth.camera_screen
+    assert wait_for(lambda: camera.first_frame_ms is not None)
+    for shot in range(3):
+        camera.start_countdown(None)
+        camera.countdown_value = 1
+        camera.update_countdown()
+        assert wait_for(lambda: camera.shots_pending == 0)
+    assert booth.currentWidget() is booth.filter_screen
+
+
+def save_strip(booth):
+    booth.filter_screen.go_to_final()
+    final = booth.final_screen
+    assert wait_for(lambda: all(label.pixmap() is not None and not label.pixmap().isNull()
+                                for label in final.img_labels))
+    final.save_image()
+    assert wait_for(lambda: booth.currentWidget() is booth.home)
+
+
+def test_sessions_reuse_one_frame_buffer(clip, tmp_path):
+    booth = kiosk(clip, str(tmp_path))
+    frames = booth.camera_screen.frames
+    buffers = []
+    for session in range(3):
+        take_shots(booth)
+        buffers.append(frames.buffer)
+        save_strip(booth)
+        assert wait_for(lambda: not booth.pending_releases)
+    assert frames.allocations == 1
+    assert all(buffer is buffers[0] for buffer in buffers)
+    # Allocated at the negotiated still size, not the preview's
+    still = booth.camera.still_mode
+    assert frames.buffer.shape == (3, still.height, still.width, 3)
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("photostrip")]) == 3
+    booth.close()
+    booth.writer.close()
+
+
+def test_buffer_is_not_reused_while_its_strip_is_written(clip, tmp_path):
+    booth = kiosk(clip, str(tmp_path))
+    frames = booth.camera_screen.frames
+    # Hold the writer up so the first strip is still queued when the next session starts
+    gate = threading.Event()
+    booth.writer.submit_render(lambda path: gate.wait(30))
+
+    take_shots(booth)
+    first = frames.buffer
+    save_strip(booth)
+    take_shots(booth)
+    assert frames.buffer is not first
+    save_strip(booth)
+
+    gate.set()
+    assert wait_for(lambda: not booth.pending_releases)
+    for session in range(2):
+        take_shots(booth)
+        save_strip(booth)
+        assert wait_for(lambda: not booth.pending_releases)
+    # The two buffers take turns; nothing more is allocated
+    assert frames.allocations == 2
+    booth.close()
+    booth.writer.close()
+
+
+def test_closing_booths_mid_burst(clip, tmp_path, monkeypatch):
+    import main as booth_app
+    from photobooth import burst
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    # A slot error would otherwise abort the process
+    errors = []
+    monkeypatch.setattr(sys, "excepthook", lambda *exc_info: errors.append(exc_info))
+    # Scoring outlasts the close, so its result arrives after the pool has stopped
+    best_frame = burst.best_frame
+    monkeypatch.setattr(burst, "best_frame", lambda recorder: (time.sleep(0.3), best_frame(recorder))[1])
+
+    multi = booth_app.MultiBooth([booth_app.camera_source(clip)] * 2, workers=1)
+    multi.show()
+    booth = multi.booths[0]
+    camera = booth.camera_screen
+    booth.home.open_camera_window()
+    assert wait_for(lambda: camera.first_frame_ms is not None)
+    for shot in range(3):
+        camera.start_countdown(None)
+        camera.countdown_value = 1
+        camera.update_countdown()
+        if shot < 2:
+            assert wait_for(lambda: camera.shots_pending == 0)
+    assert camera.shots_pending == 1
+
+    multi.close()
+    wait_for(lambda: False, 0.5)
+    assert errors == []
+    assert booth.currentWidget() is booth.camera_screen
@@ -0,0 +1,29 @@
+"""Uploads are kept large enough to reprint, with only the thumbnail scaled down."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.loader import load_image
+from photobooth.pipeline import REPRINT_DPI, REPRINT_SIZE, RenderSettings, scale_image
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_upload_is_kept_at_reprint_size(tmp_path):
+    path = str(tmp_path / "photo.jpg")
+    source = QImage(4000, 3000, QImage.Format.Format_RGB32)
+    source.fill(QColor("#3366aa"))
+    assert source.save(path)
+
+    loaded = load_image(path, RenderSettings().source_boxes(), (100, 100))
+    assert max(loaded.thumbnail.width(), loaded.thumbnail.height()) == 100
+    # A gallery reprint draws the photo as large as it would from the original file
+    reprint = RenderSettings(export_dpi=REPRINT_DPI, print_size=REPRINT_SIZE).layout().photo_size
+    assert scale_image(loaded.image, reprint).size() == scale_image(source, reprint).size()
+    assert loaded.image.width() < source.width()
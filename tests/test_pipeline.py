@@ -0,0 +1,44 @@
+"""Rendering equivalence checks for the strip pipeline."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.cache import FilterCache
+from photobooth.filters import FILTERS, array_to_qimage, filter_pixmap
+from photobooth.pipeline import PHOTO_SIZE, PREVIEW_SIZE, RenderSettings, render_photo
+
+app = QApplication.instance() or QApplication([])
+
+
+def source(size, seed=0):
+    width, height = size
+    rng = np.random.default_rng(seed)
+    return array_to_qimage(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+def original_photo(image, name, size):
+    """The original app's path: filter a full-size pixmap, then scale the pixmap"""
+    pixmap = filter_pixmap(QPixmap.fromImage(image), name)
+    return pixmap.scaled(size[0], size[1], Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation).toImage()
+
+
+@pytest.mark.parametrize("name", list(FILTERS))
+@pytest.mark.parametrize("source_size", [(160, 120), (1280, 720)], ids=["small", "720p"])
+@pytest.mark.parametrize("size", [PREVIEW_SIZE, PHOTO_SIZE], ids=["preview", "photo"])
+def test_filter_first_matches_original(name, source_size, size):
+    image = source(source_size)
+    settings = RenderSettings(scale_first=False)
+    photo = render_photo(image, name, size, settings, cache=FilterCache())
+    expected = original_photo(image, name, size)
+    rgb32 = QImage.Format.Format_RGB32
+    assert photo.convertToFormat(rgb32) == expected.convertToFormat(rgb32)
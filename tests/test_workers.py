@@ -0,0 +1,27 @@
+"""Batches on the shared fair pool."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.workers import FairPool, TaskBatch
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_batch_on_a_closed_pool_is_cancelled():
+    pool = FairPool(1)
+    lane = pool.lane("booth1")
+    pool.close()
+    finished = []
+    batch = TaskBatch(pow, [(2, 3), (3, 2)], pool=lane)
+    batch.finished.connect(finished.append)
+    batch.start()
+    app.processEvents()
+    assert batch.cancelled
+    assert finished == []
+    assert lane.stats()["queued"] == 0
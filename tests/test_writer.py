@@ -0,0 +1,71 @@
+"""Background strip writer: waiting covers callbacks, and a failing one is contained."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage
+from PyQt6.QtWidgets import QApplication
+
+from photobooth.writer import StripWriter
+
+app = QApplication.instance() or QApplication([])
+
+
+def strip():
+    image = QImage(22, 33, QImage.Format.Format_RGB32)
+    image.fill(QColor("#FFFDD0"))
+    return image
+
+
+def test_wait_covers_on_done(tmp_path):
+    writer = StripWriter(str(tmp_path))
+    done = []
+
+    def slow_callback(path, error):
+        time.sleep(0.2)
+        done.append((path, error))
+
+    path = writer.submit(strip(), on_done=slow_callback)
+    assert writer.wait(5)
+    assert done == [(path, None)]
+    writer.close()
+
+
+def test_failing_on_done_does_not_stop_the_writer(tmp_path):
+    writer = StripWriter(str(tmp_path))
+    done = []
+
+    def broken_callback(path, error):
+        raise RuntimeError("callback failed")
+
+    writer.submit(strip(), on_done=broken_callback)
+    path = writer.submit(strip(), on_done=lambda path, error: done.append(path))
+    assert writer.wait(5)
+    assert done == [path]
+    assert writer.written == 2
+    writer.close()
+
+
+def test_close_joins_the_thread(tmp_path):
+    writer = StripWriter(str(tmp_path))
+    writer.submit(strip())
+    thread = writer._thread
+    writer.close()
+    assert not thread.is_alive()
+    assert writer.depth == 0
+
+
+def test_wait_times_out_while_a_job_is_running(tmp_path):
+    writer = StripWriter(str(tmp_path))
+    release = threading.Event()
+    writer.submit(strip(), on_done=lambda path, error: release.wait(5))
+    assert not writer.wait(0.05)
+    release.set()
+    assert writer.wait(5)
+    assert writer.depth == 0
+    writer.close()